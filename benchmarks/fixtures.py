@@ -0,0 +1,273 @@
+# benchmarks/fixtures.py
+# ERGA Sequencing and Assembly Committee
+# Synthetic assembly results for benchmarking make_EAR.py and glxy/make_EAR_glxy.py:
+# gfastats reports, BUSCO short summaries, Merqury folders (with per-scaffold qv files),
+# GenomeScope/Smudgeplot summaries and PNGs of a given pixel size, plus the YAML files
+# of both scripts pointing at them.
+#
+# python benchmarks/fixtures.py OUTDIR [--haplotypes N] [--image-px PX] [--scaffolds N]
+
+import argparse
+import os
+
+from PIL import Image
+
+SPECIES = "Testus syntheticus"
+TOLID = "xTesSyn1"
+STAGES = {"Pre-curation": "pre", "Curated": "cur"}
+
+
+# an image that compresses like a real plot: a gradient with noise on every channel
+def write_png(path, width, height, seed=0):
+    gradient = Image.linear_gradient("L").resize((width, height))
+    channels = [
+        Image.blend(
+            gradient,
+            Image.effect_noise((width, height), 15 + 5 * ((seed + i) % 4)),
+            0.5,
+        )
+        for i in range(3)
+    ]
+    Image.merge("RGB", channels).save(path)
+
+
+def write_gfastats(path, total_bp, scaffolds, gaps):
+    scaffold_n50 = total_bp // max(scaffolds // 10, 1)
+    contig_n50 = scaffold_n50 // 5
+    lines = [
+        "+++Assembly summary+++: ",
+        f"# scaffolds: {scaffolds}",
+        f"Total scaffold length: {total_bp}",
+        f"Average scaffold length: {total_bp / scaffolds:.2f}",
+        f"Scaffold N50: {scaffold_n50}",
+        f"Scaffold auN: {scaffold_n50 * 1.1:.2f}",
+        f"Scaffold L50: {max(scaffolds // 20, 1)}",
+        f"Largest scaffold: {scaffold_n50 * 2}",
+        "Smallest scaffold: 1000",
+        f"# contigs: {scaffolds + gaps}",
+        f"Total contig length: {total_bp - gaps * 200}",
+        f"Average contig length: {total_bp / (scaffolds + gaps):.2f}",
+        f"Contig N50: {contig_n50}",
+        f"Contig auN: {contig_n50 * 1.1:.2f}",
+        f"Contig L50: {max(scaffolds // 4, 1)}",
+        f"Largest contig: {contig_n50 * 2}",
+        "Smallest contig: 100",
+        f"# gaps in scaffolds: {gaps}",
+        f"Total gap length in scaffolds: {gaps * 200}",
+        "Average gap length in scaffolds: 200.00",
+        "Gap N50 in scaffolds: 200",
+        "Gap auN in scaffolds: 200.00",
+        f"Gap L50 in scaffolds: {max(gaps // 2, 1)}",
+        "Largest gap in scaffolds: 200",
+        "Smallest gap in scaffolds: 200",
+        "Base composition (A:C:G:T): 30:20:20:30",
+        "GC content %: 40.85",
+        "# soft-masked bases: 0",
+    ]
+    for i in range(10, 101, 10):
+        lines.append(f"Scaffold N{i}: {scaffold_n50 * (100 - i) // 50 + 1}")
+        lines.append(f"Scaffold L{i}: {max(scaffolds * i // 300, 1)}")
+        lines.append(f"Contig N{i}: {contig_n50 * (100 - i) // 50 + 1}")
+        lines.append(f"Contig L{i}: {max(scaffolds * i // 60, 1)}")
+    with open(path, "w") as file:
+        file.write("\n".join(lines) + "\n")
+
+
+def write_busco(path, single=93.5, duplicated=1.7):
+    fragmented = 1.2
+    missing = 100 - single - duplicated - fragmented
+    with open(path, "w") as file:
+        file.write(
+            "# BUSCO version is: 5.4.7\n"
+            "# The lineage dataset is: vertebrata_odb10 (Creation date: 2021-02-19, number of genomes: 67, number of BUSCOs: 3354)\n"
+            "# Summarized benchmarking in BUSCO notation for file asm.fa\n"
+            "# BUSCO was run in mode: genome\n\n"
+            "\t***** Results: *****\n\n"
+            f"\tC:{single + duplicated:.1f}%[S:{single:.1f}%,D:{duplicated:.1f}%],F:{fragmented:.1f}%,M:{missing:.1f}%,n:3354\n"
+        )
+
+
+# one Merqury run over up to two assemblies, with the per-scaffold qv files
+# (one line per scaffold) that make real Merqury folders large
+def write_merqury(folder, assemblies, scaffolds, image_px):
+    os.makedirs(folder, exist_ok=True)
+    rows = [
+        f"{asm}\t{1200 + i}\t3000000000\t{52.34 - i:.4f}\t5.8e-06\n"
+        for i, asm in enumerate(assemblies)
+    ]
+    if len(assemblies) > 1:
+        rows.append("Both\t2400\t6000000000\t51.8400\t6.5e-06\n")
+    with open(os.path.join(folder, "out.qv"), "w") as file:
+        file.writelines(rows)
+    with open(os.path.join(folder, "out.completeness.stats"), "w") as file:
+        for i, asm in enumerate(assemblies):
+            file.write(f"{asm}\tall\t{900 - i}\t1000\t{95.1 - i:.4f}\n")
+        if len(assemblies) > 1:
+            file.write("both\tall\t990\t1000\t99.0000\n")
+
+    spectra_px = (image_px * 6 // 10, image_px // 2)
+    for i, asm in enumerate(assemblies):
+        with open(os.path.join(folder, f"out.{asm}.qv"), "w") as file:
+            file.writelines(
+                f"scaffold_{n}\t{n % 7}\t1000000\t60.1\t1e-06\n"
+                for n in range(scaffolds)
+            )
+        write_png(os.path.join(folder, f"out.{asm}.spectra-cn.ln.png"), *spectra_px, i)
+        write_png(os.path.join(folder, f"out.{asm}.spectra-cn.fl.png"), *spectra_px, i)
+    write_png(os.path.join(folder, "out.spectra-cn.ln.png"), *spectra_px, 1)
+    write_png(os.path.join(folder, "out.spectra-asm.ln.png"), *spectra_px, 2)
+
+
+def write_profiles(root):
+    os.makedirs(os.path.join(root, "genomescope"), exist_ok=True)
+    with open(os.path.join(root, "genomescope", "sample_summary.txt"), "w") as file:
+        file.write(
+            "GenomeScope version 2.0\np = 2\nk = 21\n\n"
+            "property                      min               max               \n"
+            "Homozygous (aa)               99.7%             99.8%             \n"
+            "Genome Haploid Length         3,000,000,000 bp  3,100,000,000 bp  \n"
+        )
+    os.makedirs(os.path.join(root, "smudgeplot"), exist_ok=True)
+    with open(
+        os.path.join(root, "smudgeplot", "sample_verbose_summary.txt"), "w"
+    ) as file:
+        file.write("* Proposed ploidy: 2\n")
+
+
+def yaml_header(genomescope, smudgeplot):
+    return (
+        f"ToLID: {TOLID}\n"
+        f"Species: {SPECIES}\n"
+        "Sex: XX\n"
+        "Submitter: Benchmark\n"
+        "Affiliation: ERGA\n"
+        "Tags: ERGA-BGE\n\n"
+        "DATA:\n  - HiFi: 30x\n  - HiC: 60x\n\n"
+        f"PROFILING:\n  GenomeScope:\n{genomescope}  Smudgeplot:\n{smudgeplot}\n"
+        "ASSEMBLIES:\n"
+    )
+
+
+YAML_NOTES = (
+    "\nNOTES:\n"
+    "  Obs_Haploid_num: 28\n"
+    "  Obs_Sex: XX\n"
+    "  Interventions_per_Gb: 5\n"
+    '  Contamination_notes: "none"\n'
+    '  Other_notes: "synthetic benchmark fixture"\n'
+)
+
+
+# write a fixture to root and return the paths of its make_EAR.py and glxy YAML files
+def make_fixture(root, haplotypes=2, image_px=2000, scaffolds=1000):
+    root = os.path.abspath(root)
+    haps = [f"hap{i + 1}" for i in range(haplotypes)]
+    write_profiles(root)
+
+    make_ear_yaml = yaml_header(
+        f"    results_folder: {root}/genomescope\n",
+        f"    results_folder: {root}/smudgeplot\n",
+    )
+    glxy_yaml = yaml_header(
+        f"    genomescope_summary_txt: {root}/genomescope/sample_summary.txt\n",
+        f"    smudgeplot_verbose_summary_txt: {root}/smudgeplot/sample_verbose_summary.txt\n",
+    )
+
+    for stage, folder in STAGES.items():
+        stage_dir = os.path.join(root, folder)
+        os.makedirs(stage_dir, exist_ok=True)
+        pipeline = (
+            "[hifiasm_v0.19.8|--hom-cov 30, purge_dups_v1.2.6]"
+            if stage == "Pre-curation"
+            else "[PretextView_v0.2.5, rapid_curation_v2.0]"
+        )
+        make_ear_yaml += f"  {stage}:\n    pipeline: {pipeline}\n"
+        glxy_yaml += f"  {stage}:\n    pipeline: {pipeline}\n"
+
+        # Merqury is run on the first two haplotypes (a diploid pair)
+        merqury_dir = os.path.join(stage_dir, "merqury")
+        merqury_haps = haps[:2]
+        write_merqury(
+            merqury_dir, [f"asm.{hap}" for hap in merqury_haps], scaffolds, image_px
+        )
+
+        for i, hap in enumerate(haps):
+            total_bp = (
+                3_000_000_000 + i * 10_000_000 + (5_000_000 if folder == "pre" else 0)
+            )
+            gfastats = os.path.join(stage_dir, f"{hap}.gfastats.txt")
+            busco = os.path.join(stage_dir, f"{hap}.busco.txt")
+            write_gfastats(gfastats, total_bp, scaffolds, gaps=scaffolds // 4)
+            write_busco(busco)
+            entries = {
+                "gfastats--nstar-report_txt": gfastats,
+                "busco_short_summary_txt": busco,
+            }
+            make_ear_entries = dict(entries)
+            glxy_entries = dict(entries)
+            if hap in merqury_haps:
+                make_ear_entries["merqury_folder"] = merqury_dir
+                glxy_entries["merqury_qv"] = os.path.join(merqury_dir, "out.qv")
+                glxy_entries["merqury_completeness_stats"] = os.path.join(
+                    merqury_dir, "out.completeness.stats"
+                )
+            if stage == "Curated":
+                hic = os.path.join(stage_dir, f"{hap}.hic.png")
+                blob = os.path.join(stage_dir, f"{hap}.blob.png")
+                write_png(hic, image_px, image_px, i)
+                write_png(blob, image_px, image_px, i + 1)
+                images = {
+                    "hic_FullMap_png": hic,
+                    "hic_FullMap_link": f"https://example.org/{hap}.pretext",
+                    "blobplot_cont_png": blob,
+                }
+                make_ear_entries.update(images)
+                glxy_entries.update(images)
+                if hap in merqury_haps:
+                    glxy_entries.update(
+                        {
+                            "merqury_hap_spectra_cn_png": os.path.join(
+                                merqury_dir, f"out.asm.{hap}.spectra-cn.ln.png"
+                            ),
+                            "merqury_spectra_cn_png": os.path.join(
+                                merqury_dir, "out.spectra-cn.ln.png"
+                            ),
+                            "merqury_spectra_asm_png": os.path.join(
+                                merqury_dir, "out.spectra-asm.ln.png"
+                            ),
+                        }
+                    )
+
+            make_ear_yaml += f"    {hap}:\n" + "".join(
+                f"      {key}: {value}\n" for key, value in make_ear_entries.items()
+            )
+            glxy_yaml += f"    {hap}:\n" + "".join(
+                f"      {key}: {value}\n" for key, value in glxy_entries.items()
+            )
+
+    yaml_files = {}
+    for name, text in [("make_EAR", make_ear_yaml), ("glxy", glxy_yaml)]:
+        yaml_files[name] = os.path.join(root, f"{name}.yaml")
+        with open(yaml_files[name], "w") as file:
+            file.write(text + YAML_NOTES)
+    return yaml_files
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write synthetic EAR input files and YAMLs for benchmarking"
+    )
+    parser.add_argument("outdir", type=str, help="Folder to write the fixture to")
+    parser.add_argument("--haplotypes", type=int, default=2)
+    parser.add_argument(
+        "--image-px", type=int, default=2000, help="Width of the HiC and blob PNGs"
+    )
+    parser.add_argument(
+        "--scaffolds", type=int, default=1000, help="Scaffolds per assembly"
+    )
+    args = parser.parse_args()
+
+    for name, path in make_fixture(
+        args.outdir, args.haplotypes, args.image_px, args.scaffolds
+    ).items():
+        print(f"{name}: {path}")
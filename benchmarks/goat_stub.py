@@ -0,0 +1,92 @@
+# benchmarks/goat_stub.py
+# ERGA Sequencing and Assembly Committee
+# Local stand-in for the GoaT API, so benchmarks time the requests without the network.
+# Point the EAR scripts at it with EAR_GOAT_API=<url printed at start>.
+#
+# python benchmarks/goat_stub.py [--port PORT]
+
+import argparse
+import json
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TAXON_ID = "2759"
+
+SEARCH_RESPONSE = {
+    "status": {"hits": 1, "ok": True},
+    "results": [
+        {
+            "result": {
+                "taxon_id": TAXON_ID,
+                "scientific_name": "Testus syntheticus",
+                "lineage": [
+                    {"taxon_rank": "order", "scientific_name": "Testiformes"},
+                    {"taxon_rank": "class", "scientific_name": "Testia"},
+                ],
+            }
+        }
+    ],
+}
+
+RECORD_RESPONSE = {
+    "status": {"hits": 1, "ok": True},
+    "records": [
+        {
+            "record": {
+                "taxon_id": TAXON_ID,
+                "attributes": {
+                    "ploidy": {"value": 2, "aggregation_source": "direct"},
+                    "haploid_number": {"value": 28, "aggregation_source": "ancestor"},
+                },
+            }
+        }
+    ],
+}
+
+
+class GoatStubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.endswith("/search") and "query" in parse_qs(url.query):
+            self.send_json(200, SEARCH_RESPONSE)
+        elif url.path.endswith("/record") and "recordId" in parse_qs(url.query):
+            self.send_json(200, RECORD_RESPONSE)
+        else:
+            self.send_json(404, {"status": {"ok": False}})
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # keep benchmark output clean
+    def log_message(self, format, *args):
+        pass
+
+
+# run the stub in a background thread and yield its API url
+@contextmanager
+def serve_goat(port=0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), GoatStubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/api/v2"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local GoaT API stub")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), GoatStubHandler)
+    print(f"EAR_GOAT_API=http://127.0.0.1:{args.port}/api/v2")
+    server.serve_forever()
@@ -0,0 +1,287 @@
+# benchmarks/run_benchmarks.py
+# ERGA Sequencing and Assembly Committee
+# Time make_EAR.py and glxy/make_EAR_glxy.py end to end (and per stage, from their
+# --profile-trace output) on synthetic fixtures of growing size, against a local GoaT
+# stub, and compare with the stored baselines.
+#
+# python benchmarks/run_benchmarks.py                 # run all, fail on regressions
+# python benchmarks/run_benchmarks.py -s base -r 5    # one scenario, 5 repeats
+# python benchmarks/run_benchmarks.py --update        # store the results as baselines
+#
+# Every run first checks the startup of the scripts: `--help` must not import the modules
+# of later stages (DEFERRED_MODULES) and must stay within --startup-budget seconds over a
+# bare interpreter.
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from fixtures import make_fixture
+from goat_stub import serve_goat
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+BASELINES = os.path.join(BENCHMARK_DIR, "baselines.json")
+SCRIPTS = {
+    "make_EAR": os.path.join(REPO_DIR, "make_EAR.py"),
+    "glxy": os.path.join(REPO_DIR, "glxy", "make_EAR_glxy.py"),
+}
+
+# the scaling axes: haplotype count, image size (px) and scaffold count
+SCENARIOS = {
+    "base": ("make_EAR", 2, 2000, 1000),
+    "haplotypes-4": ("make_EAR", 4, 2000, 1000),
+    "haplotypes-8": ("make_EAR", 8, 2000, 1000),
+    "images-4000": ("make_EAR", 2, 4000, 1000),
+    "scaffolds-200k": ("make_EAR", 2, 2000, 200_000),
+    "glxy-base": ("glxy", 2, 2000, 1000),
+    "glxy-images-4000": ("glxy", 2, 4000, 1000),
+}
+
+# imported only by the stage that needs them, never at startup
+DEFERRED_MODULES = ["reportlab", "requests", "yaml", "PIL", "pytz", "numpy", "h5py"]
+DEFAULT_STARTUP_BUDGET_S = 0.15
+
+
+# fixtures are written once per size and reused by later runs
+def get_fixture(workdir, haplotypes, image_px, scaffolds):
+    root = os.path.join(workdir, "fixtures", f"h{haplotypes}_px{image_px}_s{scaffolds}")
+    done = os.path.join(root, ".done")
+    yaml_files = {name: os.path.join(root, f"{name}.yaml") for name in SCRIPTS}
+    if not os.path.exists(done):
+        print(f"Writing fixture {root}", flush=True)
+        make_fixture(root, haplotypes, image_px, scaffolds)
+        open(done, "w").close()
+    return yaml_files
+
+
+# total seconds per stage name in an EAR_trace.json
+def read_stages(trace_file):
+    with open(trace_file, "r") as file:
+        events = json.load(file)["traceEvents"]
+    stages = {}
+    for event in events:
+        stages[event["name"]] = stages.get(event["name"], 0) + event["dur"] / 1e6
+    return stages
+
+
+# one run in a fresh output folder, with cold GoaT and other caches
+def run_once(script, yaml_file, workdir, goat_api):
+    outdir = tempfile.mkdtemp(prefix="run_", dir=workdir)
+    env = dict(
+        os.environ,
+        EAR_GOAT_API=goat_api,
+        XDG_CACHE_HOME=os.path.join(outdir, "cache"),
+    )
+    command = [sys.executable, SCRIPTS[script], yaml_file, "-o", outdir]
+    command.append("--profile-trace")
+
+    start = time.perf_counter()
+    process = subprocess.run(
+        command, cwd=outdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    seconds = time.perf_counter() - start
+    if process.returncode != 0 or not any(
+        f.endswith(".pdf") for f in os.listdir(outdir)
+    ):
+        raise RuntimeError(
+            f"{' '.join(command)} failed, see {outdir}/EAR.log\n{process.stderr.decode()}"
+        )
+
+    trace_file = os.path.join(outdir, "EAR_trace.json")
+    stages = read_stages(trace_file) if os.path.exists(trace_file) else {}
+    shutil.rmtree(outdir)
+    return seconds, stages
+
+
+# median seconds of `script --help` over a bare interpreter, and the deferred modules it
+# imported (top-level packages in its -X importtime output)
+def check_startup(script, repeats):
+    def median_run(command):
+        walls = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+            walls.append(time.perf_counter() - start)
+        return statistics.median(walls)
+
+    seconds = median_run([sys.executable, SCRIPTS[script], "--help"]) - median_run(
+        [sys.executable, "-c", "pass"]
+    )
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", SCRIPTS[script], "--help"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    imported = {
+        line.split("|")[-1].strip().split(".")[0]
+        for line in process.stderr.decode().splitlines()
+        if line.startswith("import time:")
+    }
+    return seconds, [module for module in DEFERRED_MODULES if module in imported]
+
+
+# print the startup of each script and return the ones over budget or importing too much
+def compare_startup(repeats, budget):
+    failures = []
+    print(f"{'Startup':<10}  {'Seconds':>8}  Deferred modules imported")
+    for script in SCRIPTS:
+        seconds, imported = check_startup(script, repeats)
+        flag = "  OVER BUDGET" if seconds > budget else ""
+        print(f"{script:<10}  {seconds:>8.3f}  {', '.join(imported) or '-'}{flag}")
+        if seconds > budget or imported:
+            failures.append(script)
+    print()
+    return failures
+
+
+def run_scenario(name, workdir, goat_api, repeats):
+    script, haplotypes, image_px, scaffolds = SCENARIOS[name]
+    yaml_file = get_fixture(workdir, haplotypes, image_px, scaffolds)[script]
+
+    walls = []
+    stage_runs = []
+    for _ in range(repeats):
+        seconds, stages = run_once(script, yaml_file, workdir, goat_api)
+        walls.append(seconds)
+        stage_runs.append(stages)
+
+    stage_names = [stage for stage in stage_runs[0]]
+    return {
+        "script": script,
+        "haplotypes": haplotypes,
+        "image_px": image_px,
+        "scaffolds": scaffolds,
+        "wall_s": round(statistics.median(walls), 3),
+        "runs_s": [round(wall, 3) for wall in walls],
+        "stages_s": {
+            stage: round(statistics.median(run.get(stage, 0) for run in stage_runs), 4)
+            for stage in stage_names
+        },
+    }
+
+
+# print the comparison and return the names of the scenarios that got slower
+def compare(results, baselines, tolerance, min_delta):
+    regressions = []
+    name_width = max([len("Scenario")] + [len(name) for name in results])
+    print(f"\n{'Scenario':<{name_width}}  {'Baseline':>8}  {'Now':>8}  {'Change':>7}")
+    for name, result in results.items():
+        baseline = baselines.get(name, {}).get("wall_s")
+        if baseline is None:
+            print(
+                f"{name:<{name_width}}  {'-':>8}  {result['wall_s']:>8.2f}  {'new':>7}"
+            )
+            continue
+        change = (result["wall_s"] - baseline) / baseline
+        slower = (
+            result["wall_s"] > baseline * (1 + tolerance)
+            and result["wall_s"] - baseline > min_delta
+        )
+        flag = "  SLOWER" if slower else ""
+        print(
+            f"{name:<{name_width}}  {baseline:>8.2f}  {result['wall_s']:>8.2f}  {change:>+7.0%}{flag}"
+        )
+        if slower:
+            regressions.append(name)
+    return regressions
+
+
+def load_baselines():
+    if not os.path.exists(BASELINES):
+        return {"scenarios": {}}
+    with open(BASELINES, "r") as file:
+        return json.load(file)
+
+
+def save_baselines(results):
+    data = load_baselines()
+    data["host"] = {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+    data["scenarios"].update(results)
+    with open(BASELINES, "w") as file:
+        json.dump(data, file, indent=2)
+        file.write("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the EAR scripts on synthetic fixtures"
+    )
+    parser.add_argument(
+        "-s",
+        "--scenario",
+        action="append",
+        choices=list(SCENARIOS),
+        help="Scenario to run, can be repeated (default: all)",
+    )
+    parser.add_argument(
+        "-r", "--repeats", type=int, default=3, help="Runs per scenario (default: 3)"
+    )
+    parser.add_argument(
+        "-w",
+        "--workdir",
+        type=str,
+        default=os.path.join(tempfile.gettempdir(), "EAR_benchmarks"),
+        help="Folder for fixtures and run outputs (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown over the baseline, as a fraction (default: 0.25)",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.25,
+        help="Slowdowns below this many seconds are never flagged (default: 0.25)",
+    )
+    parser.add_argument(
+        "--startup-budget",
+        type=float,
+        default=DEFAULT_STARTUP_BUDGET_S,
+        help="Allowed seconds of startup (`--help`) over a bare interpreter (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help=f"Store the results in {os.path.relpath(BASELINES, REPO_DIR)} instead of comparing",
+    )
+    args = parser.parse_args()
+
+    startup_failures = compare_startup(max(args.repeats, 5), args.startup_budget)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    results = {}
+    with serve_goat() as goat_api:
+        for name in args.scenario or SCENARIOS:
+            print(f"Running {name} ({args.repeats}x)", flush=True)
+            results[name] = run_scenario(name, args.workdir, goat_api, args.repeats)
+
+    regressions = []
+    if args.update:
+        save_baselines(results)
+        print(f"Baselines written to {BASELINES}")
+    else:
+        regressions = compare(
+            results, load_baselines()["scenarios"], args.tolerance, args.min_delta
+        )
+        if regressions:
+            print(f"\nSlower than baseline: {', '.join(regressions)}")
+    if startup_failures:
+        print(f"\nSlow startup: {', '.join(startup_failures)}")
+    if regressions or startup_failures:
+        sys.exit(1)
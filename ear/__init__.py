@@ -0,0 +1,24 @@
+# ear
+# ERGA Sequencing and Assembly Committee
+# Shared parsers for the ERGA Assembly Report (EAR) scripts
+
+from .gfastats import GfastatsReport, parse_gfastats_report, read_gfastats_report
+from .fasta_stats import compute_fasta_stats, read_fasta_stats
+from .agp import compute_fai_agp_stats, read_fai_agp_stats
+from .blobtoolkit import BlobSummary, read_blobdir
+from .merqury import MerquryResults, read_merqury_folder
+from .goat import GoatClient, GoatError
+from .batch import collect_yaml_files, run_batch
+from .images import ImagePreprocessor, prepare_image
+from .validate import validate_yaml
+from .metrics import METRICS_SCHEMA_VERSION, write_metrics
+from .model import EARError, Report, ReportData, ReportMetrics
+from .report import (
+    build_report,
+    compute_metrics,
+    evaluate_warnings,
+    make_report,
+    parse_report,
+)
+from .build_cache import BuildCache
+from .resolvers import FolderResolver, GalaxyResolver
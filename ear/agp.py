@@ -0,0 +1,127 @@
+# ear/agp.py
+# ERGA Sequencing and Assembly Committee
+# Assembly statistics of a curated assembly from its .fai index and curation AGP, without
+# reading the sequence: the .fai gives the scaffold lengths, the AGP the gaps and the
+# components between them, and which scaffolds are assigned to chromosomes
+
+import os
+import re
+from array import array
+
+from . import bundles
+from .gfastats import lengths_report
+
+# chromosome assignment as named by the curation pipeline: numbered or sex chromosomes
+# and their unlocalised parts (SUPER_1, SUPER_X, SUPER_Z_unloc_2); other names are only
+# counted when the scaffold is painted in PretextView, as marked in the AGP
+CHROMOSOME_RE = re.compile(r"^SUPER_(\d+|[XYZW]\d*|B\d+)(_unloc_\d+)?$")
+PAINTED = "Painted"
+GAP_TYPES = {"N", "U"}
+
+
+# scaffold name -> length, in file order
+def read_fai(path):
+    lengths = {}
+    with bundles.open_input(path) as file:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            fields = line.rstrip("\n").split("\t")
+            try:
+                lengths[fields[0]] = int(fields[1])
+            except (IndexError, ValueError):
+                raise ValueError(f"Invalid line {number} in {path}: {line.strip()}")
+    return lengths
+
+
+# scaffold name -> (component and gap lengths in order, gaps as negative numbers) and the
+# names of the painted scaffolds
+def read_agp(path):
+    parts = {}
+    painted = set()
+    with bundles.open_input(path) as file:
+        for number, line in enumerate(file, 1):
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            try:
+                length = int(fields[2]) - int(fields[1]) + 1
+                is_gap = fields[4] in GAP_TYPES
+            except (IndexError, ValueError):
+                raise ValueError(f"Invalid line {number} in {path}: {line.strip()}")
+            parts.setdefault(fields[0], []).append(-length if is_gap else length)
+            if PAINTED in fields[9:]:
+                painted.add(fields[0])
+    return parts, painted
+
+
+# the report of a curated assembly from its .fai and AGP (gc_percent is None), with the %
+# of its length in scaffolds named or painted as chromosomes
+def compute_fai_agp_stats(fai_path, agp_path):
+    lengths = read_fai(fai_path)
+    parts, painted = read_agp(agp_path)
+    if not lengths:
+        raise ValueError(f"No sequences in {fai_path}")
+    missing = [name for name in parts if name not in lengths]
+    if missing:
+        raise ValueError(
+            f"Scaffolds of {agp_path} not in {fai_path}: {', '.join(missing[:5])}"
+        )
+
+    # a .fai and AGP of different curation rounds would give wrong contigs silently
+    for name, object_parts in parts.items():
+        agp_length = sum(abs(part) for part in object_parts)
+        if agp_length != lengths[name]:
+            raise ValueError(
+                f"{name} is {agp_length} bp in {agp_path} but {lengths[name]} bp in "
+                f"{fai_path}"
+            )
+
+    scaffolds = array("q", lengths.values())
+    contigs = array("q")
+    gaps = gap_bp = chromosome_bp = 0
+    for name, length in lengths.items():
+        if name in painted or CHROMOSOME_RE.match(name):
+            chromosome_bp += length
+        # scaffolds without AGP lines are a single component; adjacent gap lines are
+        # one run of N, as gfastats counts them
+        contig = previous = 0
+        for part in parts.get(name, [length]):
+            if part > 0:
+                contig += part
+            else:
+                if previous >= 0:
+                    gaps += 1
+                gap_bp -= part
+                if contig:
+                    contigs.append(contig)
+                    contig = 0
+            previous = part
+        if contig:
+            contigs.append(contig)
+
+    return lengths_report(
+        scaffolds,
+        contigs,
+        gaps,
+        gap_bp,
+        chromosome_percent=round(chromosome_bp / sum(scaffolds) * 100, 2),
+    )
+
+
+# statistics already computed in this process, keyed by the real paths of both files
+_stats_cache = {}
+
+
+# compute the statistics of a .fai and AGP, reusing them while the files are unchanged
+def read_fai_agp_stats(fai_path, agp_path):
+    key = (os.path.realpath(fai_path), os.path.realpath(agp_path))
+    stamp = (bundles.stamp(key[0]), bundles.stamp(key[1]))
+
+    cached = _stats_cache.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    report = compute_fai_agp_stats(*key)
+    _stats_cache[key] = (stamp, report)
+    return report
@@ -0,0 +1,150 @@
+# ear/batch.py
+# ERGA Sequencing and Assembly Committee
+# Render many EARs in a process pool, one isolated output folder per YAML
+
+import logging
+import os
+import time
+from contextlib import nullcontext
+
+from . import bundles
+from .model import EARError
+from .profiling import Profiler, save_profile
+
+YAML_EXTENSIONS = (".yaml", ".yml")
+
+
+# expand YAML files, directories (searched recursively), EAR bundles (archives with
+# YAML files at their top) and manifests (one path per line)
+def collect_yaml_files(inputs):
+    yaml_files = []
+    for item in inputs:
+        if bundles.is_archive(item):
+            yaml_files += [
+                os.path.join(item, name)
+                for name in bundles.listdir(item)
+                if name.endswith(YAML_EXTENSIONS)
+            ]
+        elif os.path.isdir(item):
+            for dir_path, dir_names, file_names in os.walk(item):
+                dir_names.sort()
+                yaml_files += [
+                    os.path.join(dir_path, name)
+                    for name in sorted(file_names)
+                    if name.endswith(YAML_EXTENSIONS)
+                ]
+        elif item.endswith(YAML_EXTENSIONS):
+            yaml_files.append(item)
+        else:
+            manifest_dir = os.path.dirname(item)
+            with open(item, "r") as file:
+                for line in file:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        yaml_files.append(os.path.join(manifest_dir, line))
+
+    # drop duplicates, keep order
+    return list(dict.fromkeys(os.path.normpath(path) for path in yaml_files))
+
+
+# one output folder per YAML, named after the file (suffixed if names repeat)
+def assign_output_dirs(yaml_files, output_dir):
+    job_dirs = {}
+    used = set()
+    for yaml_file in yaml_files:
+        name = os.path.splitext(os.path.basename(yaml_file))[0]
+        job_name, n = name, 1
+        while job_name in used:
+            n += 1
+            job_name = f"{name}_{n}"
+        used.add(job_name)
+        job_dirs[yaml_file] = os.path.join(output_dir, job_name)
+    return job_dirs
+
+
+# batch workers import the PDF renderer (reportlab, the slowest import) when they start,
+# not while their first report is timed; they then serve report after report with it
+def warm_worker():
+    from . import render
+
+
+# run one report in a worker, with the log going to the job's own EAR.log
+def run_job(make_report, yaml_file, job_dir, report_kwargs, profile=False, trace=False):
+    os.makedirs(job_dir, exist_ok=True)
+    root_logger = logging.getLogger()
+    handler = logging.FileHandler(os.path.join(job_dir, "EAR.log"))
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    root_logger.addHandler(handler)
+    root_logger.setLevel(logging.INFO)
+
+    profiler = Profiler() if profile else nullcontext()
+    start = time.perf_counter()
+    try:
+        with profiler:
+            pdf_file = make_report(yaml_file, output_dir=job_dir, **report_kwargs)
+        return yaml_file, True, time.perf_counter() - start, pdf_file
+    except EARError as e:
+        # problems with the YAML or its input files, no traceback needed
+        logging.error(str(e))
+        return yaml_file, False, time.perf_counter() - start, str(e)
+    except Exception as e:
+        logging.exception(f"Error creating the EAR for {yaml_file}")
+        return yaml_file, False, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+    finally:
+        if profile:
+            save_profile(profiler, job_dir, trace)
+        root_logger.removeHandler(handler)
+        handler.close()
+
+
+def print_summary(results, wall_time):
+    name_width = max([len("YAML")] + [len(result[0]) for result in results])
+    print(f"{'YAML':<{name_width}}  {'Status':<6}  {'Time (s)':>8}  Output")
+    for yaml_file, ok, seconds, output in results:
+        status = "OK" if ok else "FAILED"
+        print(f"{yaml_file:<{name_width}}  {status:<6}  {seconds:>8.2f}  {output}")
+
+    failed = sum(1 for result in results if not result[1])
+    print(
+        f"\n{len(results) - failed} succeeded, {failed} failed, {len(results)} total in {wall_time:.2f} s"
+    )
+
+
+# render every YAML in a pool of workers and return the per-job results
+def run_batch(
+    make_report,
+    yaml_files,
+    output_dir,
+    workers=None,
+    profile=False,
+    trace=False,
+    **report_kwargs,
+):
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    job_dirs = assign_output_dirs(yaml_files, output_dir)
+    results = []
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_worker) as executor:
+        futures = [
+            executor.submit(
+                run_job,
+                make_report,
+                yaml_file,
+                job_dirs[yaml_file],
+                report_kwargs,
+                profile,
+                trace,
+            )
+            for yaml_file in yaml_files
+        ]
+        for future in as_completed(futures):
+            results.append(future.result())
+    wall_time = time.perf_counter() - start
+
+    # report in input order
+    order = {yaml_file: i for i, yaml_file in enumerate(yaml_files)}
+    results.sort(key=lambda result: order[result[0]])
+    print_summary(results, wall_time)
+    return results
@@ -0,0 +1,177 @@
+# ear/blobplot.py
+# ERGA Sequencing and Assembly Committee
+# BlobToolKit blob plot drawn as reportlab vector graphics from a binned BlobDir
+# (ear/blobtoolkit.py): a circle per taxon and cell of the GC x coverage grid, scaled by
+# the span in it, with stacked span histograms along both axes
+
+import math
+
+from reportlab.graphics.shapes import Circle, Drawing, Group, Line, Rect, String
+from reportlab.lib import colors
+
+from .blobtoolkit import GRID_BINS, HIST_BINS, OTHER
+from .spectra import format_tick
+
+# BlobToolKit's default palette, with the taxa beyond it in grey
+BLOB_COLORS = [
+    "#1F78B4",
+    "#A6CEE3",
+    "#33A02C",
+    "#B2DF8A",
+    "#E31A1C",
+    "#FB9A99",
+    "#FF7F00",
+    "#FDBF6F",
+    "#6A3D9A",
+    "#CAB2D6",
+]
+OTHER_COLOR = "#999999"
+BLOB_OPACITY = 0.6
+# the largest circle is this many grid cells across
+MAX_BLOB_CELLS = 2
+HIST_FRACTION = 0.18
+FONT = ("Helvetica", 6)
+
+
+def format_span(span):
+    for divisor, suffix in [(1e9, "Gb"), (1e6, "Mb"), (1e3, "kb")]:
+        if span >= divisor:
+            return f"{span / divisor:.1f} {suffix}"
+    return f"{span:.0f} bp"
+
+
+# round steps between low and high
+def range_ticks(low, high, step):
+    first = math.ceil(low / step - 1e-9)
+    return [i * step for i in range(first, int(high / step + 1e-9) + 1)]
+
+
+# a Drawing of the blob plot of a BlobSummary, width x height points
+def blob_drawing(blob, width, height):
+    font_name, font_size = FONT
+    label = dict(fontName=font_name, fontSize=font_size)
+    axis = dict(strokeColor=colors.black, strokeWidth=0.5)
+    hist_size = min(width, height) * HIST_FRACTION
+    left, bottom, gap = 36, 28, 4
+    plot_width = width - left - hist_size - gap
+    plot_height = height - bottom - hist_size - gap
+    x_low, x_high = blob.x_range
+    y_low, y_high = blob.y_range
+
+    def point(x, y):
+        return (
+            left + (x - x_low) / (x_high - x_low) * plot_width,
+            bottom + (y - y_low) / (y_high - y_low) * plot_height,
+        )
+
+    palette = [
+        colors.HexColor(
+            OTHER_COLOR if name == OTHER else BLOB_COLORS[i % len(BLOB_COLORS)]
+        )
+        for i, name in enumerate(blob.categories)
+    ]
+    drawing = Drawing(width, height)
+
+    # blobs, the largest taxa first so that the smaller ones stay visible on top
+    max_span = max((span for blobs in blob.blobs for _, _, span in blobs), default=1)
+    max_radius = plot_width / GRID_BINS * MAX_BLOB_CELLS / 2
+    for color, blobs in zip(palette, blob.blobs):
+        fill = colors.Color(color.red, color.green, color.blue, alpha=BLOB_OPACITY)
+        for x, y, span in blobs:
+            drawing.add(
+                Circle(
+                    *point(x, y),
+                    max(0.5, max_radius * math.sqrt(span / max_span)),
+                    fillColor=fill,
+                    strokeColor=color,
+                    strokeWidth=0.3,
+                )
+            )
+
+    # stacked span histograms above (GC) and right of (coverage) the plot
+    x_max = max(sum(column) for column in zip(*blob.x_hist)) or 1
+    y_max = max(sum(column) for column in zip(*blob.y_hist)) or 1
+    x_step = plot_width / HIST_BINS
+    y_step = plot_height / HIST_BINS
+    hist_bottom = bottom + plot_height + gap
+    hist_left = left + plot_width + gap
+    x_stacked = [0] * HIST_BINS
+    y_stacked = [0] * HIST_BINS
+    for color, x_hist, y_hist in zip(palette, blob.x_hist, blob.y_hist):
+        for i, span in enumerate(x_hist):
+            if span:
+                drawing.add(
+                    Rect(
+                        left + i * x_step,
+                        hist_bottom + x_stacked[i] / x_max * hist_size,
+                        x_step,
+                        span / x_max * hist_size,
+                        fillColor=color,
+                        strokeColor=None,
+                    )
+                )
+                x_stacked[i] += span
+        for i, span in enumerate(y_hist):
+            if span:
+                drawing.add(
+                    Rect(
+                        hist_left + y_stacked[i] / y_max * hist_size,
+                        bottom + i * y_step,
+                        span / y_max * hist_size,
+                        y_step,
+                        fillColor=color,
+                        strokeColor=None,
+                    )
+                )
+                y_stacked[i] += span
+    drawing.add(Line(left, hist_bottom, left + plot_width, hist_bottom, **axis))
+    drawing.add(Line(hist_left, bottom, hist_left, bottom + plot_height, **axis))
+
+    # axes: GC proportion, and coverage on a log scale
+    drawing.add(Rect(left, bottom, plot_width, plot_height, fillColor=None, **axis))
+    x_tick_step = 0.1 if x_high - x_low > 0.3 else 0.05
+    for tick in range_ticks(x_low, x_high, x_tick_step):
+        x, y = point(tick, y_low)
+        drawing.add(Line(x, y, x, y - 2, **axis))
+        drawing.add(String(x, y - 9, f"{tick:.2f}", textAnchor="middle", **label))
+    for tick in range_ticks(y_low, y_high, 1):
+        x, y = point(x_low, tick)
+        drawing.add(Line(x, y, x - 2, y, **axis))
+        drawing.add(
+            String(x - 3, y - 2, format_tick(10**tick), textAnchor="end", **label)
+        )
+    drawing.add(
+        String(
+            left + plot_width / 2,
+            4,
+            "GC proportion" if blob.x_field == "gc" else blob.x_field,
+            textAnchor="middle",
+            **label,
+        )
+    )
+    y_label = Group(String(0, 0, blob.y_field, textAnchor="middle", **label))
+    y_label.translate(font_size + 2, bottom + plot_height / 2)
+    y_label.rotate(90)
+    drawing.add(y_label)
+
+    # legend in the corner between the histograms, largest taxa first
+    row_height = font_size + 2
+    x = hist_left
+    y = height - row_height
+    drawing.add(String(x, y, f"{blob.cat_field or 'records'}", **label))
+    for name, color, count, span in zip(
+        blob.categories, palette, blob.counts, blob.spans
+    ):
+        y -= row_height
+        drawing.add(
+            Rect(x, y, font_size - 1, font_size - 1, fillColor=color, strokeColor=None)
+        )
+        drawing.add(
+            String(
+                x + font_size + 1,
+                y,
+                f"{name} ({count:,}; {format_span(span)})",
+                **label,
+            )
+        )
+    return drawing
@@ -0,0 +1,223 @@
+# ear/blobtoolkit.py
+# ERGA Sequencing and Assembly Committee
+# BlobToolKit blob plot data from a local BlobDir (meta.json and one <field>.json per
+# field): GC, coverage, length and taxonomy of every record binned with numpy into a
+# fixed grid of blobs and axis histograms, so the plot drawn from it (ear/blobplot.py)
+# is the same size for a hundred contigs or millions
+
+import json
+import math
+import os
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from . import bundles
+
+GRID_BINS = 40
+HIST_BINS = 50
+# taxa beyond the largest ones by span are drawn together as "other"
+MAX_CATEGORIES = 10
+OTHER = "other"
+# coverage is drawn on a log scale, lower values at its floor as in BlobToolKit
+MIN_COVERAGE = 0.01
+# records binned at a time, to bound the temporary arrays
+BIN_CHUNK = 1_000_000
+# taxonomy fields used when meta.json names no plot category, in order of preference
+CATEGORY_FIELDS = ["bestsumorder_phylum", "bestsum_phylum", "buscoregions_phylum"]
+
+VALUES_RE = re.compile(r'"values"\s*:\s*\[')
+KEYS_RE = re.compile(r'"keys"\s*:\s*\[')
+
+
+@dataclass
+class BlobSummary:
+    x_field: str
+    y_field: str
+    z_field: str
+    cat_field: str
+    records: int
+    span: int
+    x_range: Tuple[float, float]
+    y_range: Tuple[float, float]  # log10 of the coverage
+    categories: List[str]  # by span, OTHER last
+    counts: List[int]
+    spans: List[float]
+    # per category: (span-weighted mean x, mean log10 y, span) of each non-empty cell
+    blobs: List[List[Tuple[float, float, float]]]
+    x_hist: List[List[float]]  # per category: span in each of HIST_BINS x bins
+    y_hist: List[List[float]]
+
+
+def field_path(blobdir, field_id):
+    for name in [f"{field_id}.json", f"{field_id}.json.gz"]:
+        path = os.path.join(blobdir, name)
+        if bundles.isfile(path):
+            return path
+    raise ValueError(f"No {field_id} field in {blobdir}")
+
+
+# values (numpy array) and keys (list, empty for numeric fields) of a BlobDir field;
+# flat arrays of numbers are parsed by numpy without building a Python list
+def read_field(blobdir, field_id):
+    import numpy as np
+
+    path = field_path(blobdir, field_id)
+    with bundles.open_input(path) as file:
+        text = file.read()
+
+    values = None
+    match = VALUES_RE.search(text)
+    if match:
+        end = text.find("]", match.end())
+        segment = text[match.end() : end]
+        if end != -1 and not any(char in segment for char in '[{"nNI'):
+            values = np.fromstring(segment, sep=",")
+            if len(values) != (segment.count(",") + 1 if segment.strip() else 0):
+                values = None
+    keys = []
+    match = KEYS_RE.search(text)
+    if match:
+        keys = json.JSONDecoder().raw_decode(text, match.end() - 1)[0]
+    if values is None:
+        data = json.loads(text)
+        values = data.get("values")
+        keys = data.get("keys", keys)
+        if not isinstance(values, list):
+            raise ValueError(f"No values in {path}")
+        if values and isinstance(values[0], str):
+            # categories given by name rather than by index into keys
+            keys, values = np.unique(values, return_inverse=True)
+            keys = keys.tolist()
+        try:
+            values = np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"{path} does not hold one number per record")
+        if np.isnan(values).any():
+            raise ValueError(f"{path} has records without a value")
+    return values, keys
+
+
+# (x, y, z, category) field ids: those of the plot in meta.json, else GC, the first
+# coverage field, length and the first known taxonomy field ("" for none)
+def plot_fields(blobdir):
+    with bundles.open_input(os.path.join(blobdir, "meta.json")) as file:
+        meta = json.load(file)
+    plot = meta.get("plot") or {}
+    fields = sorted(
+        name.split(".json")[0]
+        for name in bundles.listdir(blobdir)
+        if name.endswith((".json", ".json.gz"))
+    )
+    y_field = plot.get("y") or next(
+        (field for field in fields if field.endswith("_cov")), None
+    )
+    if not y_field:
+        raise ValueError(f"No coverage field in {blobdir}")
+    cat_field = plot.get("cat") or next(
+        (field for field in CATEGORY_FIELDS if field in fields), ""
+    )
+    return plot.get("x") or "gc", y_field, plot.get("z") or "length", cat_field
+
+
+def _range(values, step):
+    low = math.floor(float(values.min()) / step) * step
+    high = math.ceil(float(values.max()) / step) * step
+    return (low, high) if high > low else (low, low + step)
+
+
+def _bin_ids(values, value_range, bins):
+    import numpy as np
+
+    low, high = value_range
+    ids = ((values - low) / (high - low) * bins).astype(np.int64)
+    return np.clip(ids, 0, bins - 1)
+
+
+# the binned blob plot of a BlobDir
+def read_blobdir(blobdir):
+    import numpy as np
+
+    x_field, y_field, z_field, cat_field = plot_fields(blobdir)
+    x = read_field(blobdir, x_field)[0]
+    y = np.log10(np.maximum(read_field(blobdir, y_field)[0], MIN_COVERAGE))
+    z = read_field(blobdir, z_field)[0]
+    if not len(z):
+        raise ValueError(f"No records in {blobdir}")
+    if cat_field:
+        cat, keys = read_field(blobdir, cat_field)
+        cat = cat.astype(np.int64)
+    else:
+        cat, keys = np.zeros(len(z), dtype=np.int64), ["all"]
+    if not len(x) == len(y) == len(cat) == len(z):
+        raise ValueError(f"The fields of {blobdir} have different numbers of records")
+    if cat.min() < 0 or cat.max() >= len(keys):
+        raise ValueError(f"{cat_field} of {blobdir} has values without keys")
+
+    # the largest categories by span, the others together as OTHER
+    category_spans = np.bincount(cat, weights=z, minlength=len(keys))
+    category_counts = np.bincount(cat, minlength=len(keys))
+    order = [
+        int(i) for i in np.argsort(-category_spans, kind="stable") if category_counts[i]
+    ]
+    shown = order if len(order) <= MAX_CATEGORIES else order[: MAX_CATEGORIES - 1]
+    categories = [str(keys[i]) for i in shown]
+    group_of = np.full(len(keys), len(shown), dtype=np.int64)
+    group_of[shown] = np.arange(len(shown))
+    if len(shown) < len(order):
+        categories.append(OTHER)
+    n_groups = len(categories)
+
+    x_range = _range(x, 0.05)
+    y_range = _range(y, 1)
+    cells = n_groups * GRID_BINS * GRID_BINS
+    cell_span = np.zeros(cells)
+    cell_x = np.zeros(cells)
+    cell_y = np.zeros(cells)
+    x_hist = np.zeros(n_groups * HIST_BINS)
+    y_hist = np.zeros(n_groups * HIST_BINS)
+    counts = np.zeros(n_groups, dtype=np.int64)
+    for start in range(0, len(z), BIN_CHUNK):
+        chunk = slice(start, start + BIN_CHUNK)
+        group = group_of[cat[chunk]]
+        span = z[chunk]
+        cell = (group * GRID_BINS + _bin_ids(y[chunk], y_range, GRID_BINS)) * GRID_BINS
+        cell += _bin_ids(x[chunk], x_range, GRID_BINS)
+        cell_span += np.bincount(cell, weights=span, minlength=cells)
+        cell_x += np.bincount(cell, weights=span * x[chunk], minlength=cells)
+        cell_y += np.bincount(cell, weights=span * y[chunk], minlength=cells)
+        x_ids = group * HIST_BINS + _bin_ids(x[chunk], x_range, HIST_BINS)
+        x_hist += np.bincount(x_ids, weights=span, minlength=len(x_hist))
+        y_ids = group * HIST_BINS + _bin_ids(y[chunk], y_range, HIST_BINS)
+        y_hist += np.bincount(y_ids, weights=span, minlength=len(y_hist))
+        counts += np.bincount(group, minlength=n_groups)
+
+    blobs = []
+    for cells_of_group in np.split(np.arange(cells), n_groups):
+        filled = cells_of_group[cell_span[cells_of_group] > 0]
+        spans = cell_span[filled]
+        blobs.append(
+            list(
+                zip(
+                    (cell_x[filled] / spans).tolist(),
+                    (cell_y[filled] / spans).tolist(),
+                    spans.tolist(),
+                )
+            )
+        )
+    return BlobSummary(
+        x_field=x_field,
+        y_field=y_field,
+        z_field=z_field,
+        cat_field=cat_field,
+        records=len(z),
+        span=int(z.sum()),
+        x_range=x_range,
+        y_range=y_range,
+        categories=categories,
+        counts=counts.tolist(),
+        spans=x_hist.reshape(n_groups, HIST_BINS).sum(axis=1).tolist(),
+        blobs=blobs,
+        x_hist=x_hist.reshape(n_groups, HIST_BINS).tolist(),
+        y_hist=y_hist.reshape(n_groups, HIST_BINS).tolist(),
+    )
@@ -0,0 +1,204 @@
+# ear/build_cache.py
+# ERGA Sequencing and Assembly Committee
+# Content-hash build cache: an EAR whose YAML, input files and render options are
+# unchanged is copied from the cache instead of being built again, and parsed inputs
+# are reused by content hash when only some of them changed
+
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+
+from . import bundles
+from .images import DEFAULT_DPI
+
+DEFAULT_BUILD_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "EAR", "build"
+)
+# bump when the layout of cached entries or parsed results changes
+BUILD_CACHE_VERSION = 3
+
+# files make_report reads in the folders a YAML points to, other folders are hashed whole
+FOLDER_PATTERNS = {
+    "merqury_folder": [
+        "*.qv",
+        "*.completeness.stats",
+        "*.spectra-*.png",
+        "*.spectra-*.hist",
+    ],
+    "results_folder": ["*summary.txt"],
+    "blobtoolkit_dataset": ["*.json"],
+}
+
+
+# (yaml key, path) of every input path in the YAML (bundles.is_path_key) that names an
+# existing file or folder
+def referenced_paths(yaml_data, key=None):
+    if isinstance(yaml_data, dict):
+        for child_key, value in yaml_data.items():
+            yield from referenced_paths(value, child_key)
+    elif isinstance(yaml_data, list):
+        for value in yaml_data:
+            yield from referenced_paths(value, key)
+    elif (
+        bundles.is_path_key(key)
+        and isinstance(yaml_data, str)
+        and bundles.exists(yaml_data)
+    ):
+        yield key, yaml_data
+
+
+class BuildCache:
+    def __init__(self, cache_dir=DEFAULT_BUILD_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._hashes = {}  # realpath -> [size, mtime_ns, sha256]
+
+    # sha256 of a file, only read again when its size or mtime (or those of the
+    # archive it is in) changed; each file's hash is stored on its own, so concurrent
+    # runs never overwrite each other's
+    def file_hash(self, path):
+        try:
+            stat = os.stat(bundles.split_path(path)[0])
+        except OSError:
+            return None
+        key = os.path.realpath(path)
+        name = os.path.join(
+            "hashes", hashlib.sha256(key.encode()).hexdigest() + ".json"
+        )
+        entry = self._hashes.get(key)
+        if entry is None:
+            stored = self._read_json(name)
+            # [path, size, mtime_ns, sha256], the path guarding against name collisions
+            if stored and stored[0] == key:
+                entry = stored[1:]
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            self._hashes[key] = entry
+            return entry[2]
+        try:
+            entry = [stat.st_size, stat.st_mtime_ns, bundles.sha256_file(path)]
+        except OSError:
+            return None
+        self._hashes[key] = entry
+        self._write_json(name, [key, *entry])
+        return entry[2]
+
+    # hashes of the files behind a YAML value: the file itself or the files of a folder
+    def input_hashes(self, key, path):
+        if bundles.isfile(path):
+            return {path: self.file_hash(path)}
+        patterns = FOLDER_PATTERNS.get(key, ["*"])
+        hashes = {}
+        for name in bundles.listdir(path):
+            if any(
+                fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(name, f"{pattern}.gz")
+                for pattern in patterns
+            ):
+                file_path = os.path.join(path, name)
+                hashes[file_path] = self.file_hash(file_path)
+        return hashes
+
+    # everything the PDF and metrics JSON depend on, the GoaT taxonomy (a dict) included,
+    # apart from the date and time they were built
+    def fingerprint(
+        self,
+        yaml_file,
+        yaml_data,
+        ear_version,
+        image_preprocessor=None,
+        resolver=None,
+        max_size=None,
+        taxonomy=None,
+    ):
+        inputs = {}
+        for key, path in referenced_paths(yaml_data):
+            inputs.update(self.input_hashes(key, path))
+        document = {
+            "cache_version": BUILD_CACHE_VERSION,
+            "ear_version": ear_version,
+            "yaml": self.file_hash(yaml_file),
+            "resolver": type(resolver).__name__ if resolver else None,
+            "inputs": inputs,
+            "image_dpi": image_preprocessor.dpi if image_preprocessor else DEFAULT_DPI,
+            "jpeg_quality": (
+                image_preprocessor.jpeg_quality if image_preprocessor else None
+            ),
+            "max_size": max_size,
+            "taxonomy": taxonomy,
+        }
+        return hashlib.sha256(json.dumps(document, sort_keys=True).encode()).hexdigest()
+
+    # copy a cached build to output_dir, return the PDF path and when it was built
+    # (ISO 8601), or (None, None) if not cached
+    def restore(self, fingerprint, output_dir):
+        entry_dir = os.path.join(self.cache_dir, "reports", fingerprint)
+        entry = self._read_json(os.path.join("reports", fingerprint, "entry.json"))
+        if not entry:
+            return None, None
+        for name in entry["files"]:
+            cached_file = os.path.join(entry_dir, name)
+            output_file = os.path.join(output_dir, name)
+            if not os.path.exists(cached_file):
+                return None, None
+            # leave outputs that are already the cached file alone
+            if self.file_hash(output_file) != self.file_hash(cached_file):
+                tmp_path = f"{output_file}.{os.getpid()}.tmp"
+                shutil.copyfile(cached_file, tmp_path)
+                os.replace(tmp_path, output_file)
+        return os.path.join(output_dir, entry["files"][0]), entry["built"]
+
+    # keep copies of a fresh build (PDF first) under its fingerprint
+    def store(self, fingerprint, files):
+        entry_dir = os.path.join(self.cache_dir, "reports", fingerprint)
+        try:
+            os.makedirs(entry_dir, exist_ok=True)
+            for path in files:
+                shutil.copyfile(path, os.path.join(entry_dir, os.path.basename(path)))
+            self._write_json(
+                os.path.join("reports", fingerprint, "entry.json"),
+                {
+                    "files": [os.path.basename(path) for path in files],
+                    "built": datetime.now().isoformat(timespec="seconds"),
+                },
+            )
+        except OSError as e:
+            logging.warning(f"Could not write build cache {entry_dir}: {str(e)}")
+
+    # parse(path) through the cache, keyed by the file's content hash; to_json and
+    # from_json convert the result to and from something json can store
+    def parsed(self, kind, path, parse, to_json=None, from_json=None):
+        file_hash = self.file_hash(path)
+        if file_hash is None:
+            return parse(path)
+        name = os.path.join("parsed", kind, f"{file_hash}.json")
+        cached = self._read_json(name)
+        if cached is not None:
+            return from_json(cached["result"]) if from_json else cached["result"]
+        result = parse(path)
+        self._write_json(name, {"result": to_json(result) if to_json else result})
+        return result
+
+    def _read_json(self, name):
+        try:
+            with open(os.path.join(self.cache_dir, name), "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if isinstance(data, dict) and data.get("cache_version") == BUILD_CACHE_VERSION:
+            return data["data"]
+        return None
+
+    def _write_json(self, name, data):
+        path = os.path.join(self.cache_dir, name)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # write then rename, so concurrent runs never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as file:
+                json.dump({"cache_version": BUILD_CACHE_VERSION, "data": data}, file)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not write build cache {path}: {str(e)}")
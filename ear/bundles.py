@@ -0,0 +1,307 @@
+# ear/bundles.py
+# ERGA Sequencing and Assembly Committee
+# Input paths that reach into archives: "merqury.tar.gz/out.qv" is read from the member of
+# the archive and "summary.txt.gz" is decompressed on the fly, so archived results folders
+# (and whole EAR bundles with their YAML) are used without extracting them to disk
+
+import fnmatch
+import glob as globlib
+import gzip
+import hashlib
+import io
+import os
+import re
+import tarfile
+import zipfile
+
+ARCHIVE_SUFFIXES = (
+    ".tar",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+    ".zip",
+)
+
+# YAML keys whose values are input files or folders: the *_txt, *_png and *_folder
+# entries, assembly_* and merqury_* files, the HiC cooler file and the BlobDir
+PATH_KEY_RE = re.compile(
+    r"^(assembly_|merqury_)|(_txt|_png|_folder)$|^(hic_FullMap_mcool|blobtoolkit_dataset)$"
+)
+
+
+def is_path_key(key):
+    return isinstance(key, str) and PATH_KEY_RE.search(key) is not None
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# (archive, member) for a path that goes through an archive, (path, None) otherwise;
+# the archive itself is its root folder, member ""
+def split_path(path):
+    parts = os.path.normpath(path).split(os.sep)
+    for i in range(1, len(parts) + 1):
+        head = os.sep.join(parts[:i])
+        if is_archive(head) and os.path.isfile(head):
+            return head, "/".join(parts[i:])
+    return path, None
+
+
+# a binary stream read through other open files (a tar member through its own TarFile,
+# a .gz member through the member), which are closed with it
+class _MemberFile(io.BufferedIOBase):
+    def __init__(self, file, *owners):
+        self._file = file
+        self._owners = owners
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def read1(self, size=-1):
+        return self._file.read1(size)
+
+    def seekable(self):
+        return self._file.seekable()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+            for owner in self._owners:
+                owner.close()
+        super().close()
+
+
+# member index of a .tar(.gz/.bz2/.xz) or .zip file, read once from its headers
+class Archive:
+    def __init__(self, path):
+        self.path = path
+        self.stamp = _file_stamp(path)
+        self.files = {}  # member name -> ZipInfo or TarInfo
+        self.folders = {"": []}  # folder member name -> names of the files in it
+        try:
+            if zipfile.is_zipfile(path):
+                self._zip = zipfile.ZipFile(path)
+                self._tar = None
+                infos = [
+                    (info.filename, info)
+                    for info in self._zip.infolist()
+                    if not info.is_dir()
+                ]
+            else:
+                self._zip = None
+                with tarfile.open(path, "r:*") as tar:
+                    infos = [
+                        (info.name, info) for info in tar.getmembers() if info.isreg()
+                    ]
+        except (tarfile.TarError, zipfile.BadZipFile) as e:
+            raise OSError(f"Cannot read archive {path}: {str(e)}")
+
+        for name, info in infos:
+            name = os.path.normpath(name).lstrip("/")
+            self.files[name] = info
+            folder, _, file_name = name.rpartition("/")
+            self.folders.setdefault(folder, []).append(file_name)
+            while folder:
+                folder = folder.rpartition("/")[0]
+                self.folders.setdefault(folder, [])
+
+        # an archive of one folder ("tar czf merqury.tar.gz merqury") stands for that folder
+        top_names = {name.partition("/")[0] for name in self.files}
+        self.root = ""
+        if len(top_names) == 1 and all("/" in name for name in self.files):
+            self.root = top_names.pop()
+
+    # member name of a file or folder in the archive, None if there is none
+    def resolve(self, member):
+        candidates = [member, f"{self.root}/{member}"] if member else [self.root]
+        for name in candidates:
+            if name in self.files or name in self.folders:
+                return name
+        return None
+
+    def size(self, name):
+        info = self.files[name]
+        return info.file_size if self._zip is not None else info.size
+
+    def open(self, name):
+        if name not in self.files:
+            raise IsADirectoryError(f"{name} is a folder in {self.path}")
+        if self._zip is not None:
+            return self._zip.open(self.files[name])
+        # tar members share one (possibly compressed) stream, so each member is read
+        # through its own TarFile and concurrent readers never move each other's position
+        try:
+            tar = tarfile.open(self.path, "r:*")
+        except tarfile.TarError as e:
+            raise OSError(f"Cannot read archive {self.path}: {str(e)}")
+        return _MemberFile(tar.extractfile(self.files[name]), tar)
+
+
+# archives already indexed in this process, keyed by real path
+_archives = {}
+
+
+# index an archive, reusing the previous one while the file is unchanged
+def get_archive(path):
+    real_path = os.path.realpath(path)
+    archive = _archives.get(real_path)
+    if archive is None or archive.stamp != _file_stamp(real_path):
+        archive = Archive(real_path)
+        _archives[real_path] = archive
+    return archive
+
+
+# (archive, member name) of a path inside an archive, None for a plain path
+def _member(path):
+    archive_path, member = split_path(path)
+    if member is None:
+        return None
+    archive = get_archive(archive_path)
+    name = archive.resolve(member)
+    if name is None:
+        raise FileNotFoundError(f"No {member} in {archive_path}")
+    return archive, name
+
+
+def isfile(path):
+    try:
+        found = _member(path)
+    except OSError:
+        return False
+    return os.path.isfile(path) if found is None else found[1] in found[0].files
+
+
+def isdir(path):
+    try:
+        found = _member(path)
+    except OSError:
+        return False
+    return os.path.isdir(path) if found is None else found[1] in found[0].folders
+
+
+def exists(path):
+    return isfile(path) or isdir(path)
+
+
+# names of the files in a folder, sorted
+def listdir(path):
+    found = _member(path)
+    if found is None:
+        with os.scandir(path) as entries:
+            return sorted(entry.name for entry in entries if entry.is_file())
+    archive, name = found
+    if name not in archive.folders:
+        raise NotADirectoryError(f"{path} is not a folder")
+    return sorted(archive.folders[name])
+
+
+# files in folder matching pattern, or else its gzipped version (pattern + ".gz")
+def glob(folder, pattern):
+    if split_path(folder)[1] is None:
+        return globlib.glob(os.path.join(folder, pattern)) or globlib.glob(
+            os.path.join(folder, f"{pattern}.gz")
+        )
+    try:
+        names = listdir(folder)
+    except OSError:
+        return []
+    for name_pattern in [pattern, f"{pattern}.gz"]:
+        matches = [
+            os.path.join(folder, name)
+            for name in names
+            if fnmatch.fnmatch(name, name_pattern)
+        ]
+        if matches:
+            return matches
+    return []
+
+
+# open a file for reading, from inside an archive and decompressing .gz files
+def open_input(path, mode="r"):
+    binary = "b" in mode
+    found = _member(path)
+    if found is None:
+        if path.endswith(".gz"):
+            return gzip.open(path, "rb" if binary else "rt")
+        return open(path, "rb" if binary else "r")
+
+    archive, name = found
+    file = archive.open(name)
+    if name.endswith(".gz"):
+        file = _MemberFile(gzip.GzipFile(fileobj=file), file)
+    return file if binary else io.TextIOWrapper(file)
+
+
+def read_bytes(path):
+    with open_input(path, "rb") as file:
+        return file.read()
+
+
+# sha256 of the content (decompressed, for .gz files)
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open_input(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def getsize(path):
+    found = _member(path)
+    if found is None:
+        return os.path.getsize(path)
+    return found[0].size(found[1])
+
+
+# changes whenever the file (or the archive it is in) changes, for in-process caches
+def stamp(path):
+    found = _member(path)
+    if found is None:
+        return _file_stamp(path)
+    archive, name = found
+    return (*archive.stamp, name)
+
+
+# relative paths in a YAML file inside an archive point to members next to it
+def resolve_yaml_paths(yaml_file, yaml_data):
+    if split_path(yaml_file)[1] is None:
+        return yaml_data
+    base = os.path.dirname(yaml_file)
+
+    def rebase(value, key=None):
+        if isinstance(value, dict):
+            return {
+                child_key: rebase(item, child_key) for child_key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [rebase(item, key) for item in value]
+        if (
+            is_path_key(key)
+            and isinstance(value, str)
+            and value
+            and not os.path.isabs(value)
+        ):
+            path = os.path.join(base, value)
+            if exists(path):
+                return path
+        return value
+
+    return rebase(yaml_data)
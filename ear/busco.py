@@ -0,0 +1,158 @@
+# ear/busco.py
+# ERGA Sequencing and Assembly Committee
+# Single-pass parser for BUSCO short summaries, text or the JSON of BUSCO 5
+
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from . import bundles
+
+VERSION_RE = re.compile(r"# BUSCO version is: ([\d.]+)")
+LINEAGE_RE = re.compile(
+    r"The lineage dataset is: (.*?) \(Creation date:.*?, number of (?:genomes|species): (\d+), number of BUSCOs: (\d+)\)"
+)
+RESULTS_RE = re.compile(r"C:.*n:\d+")
+SCORE_RE = re.compile(r"\b([CSDFM]):(\d+(?:\.\d+)?)%")
+COUNT_RE = re.compile(r"^\s*(\d+)\s+.*BUSCOs \(([CSDFM])\)")
+
+# one-letter BUSCO notation -> (percentage field, count field)
+SCORE_FIELDS = {
+    "C": ("complete", "complete_count"),
+    "S": ("single", "single_count"),
+    "D": ("duplicated", "duplicated_count"),
+    "F": ("fragmented", "fragmented_count"),
+    "M": ("missing", "missing_count"),
+}
+
+# JSON short summary "results" keys (BUSCO >= 5.5, then older 5.x) -> notation letter
+JSON_PERCENTAGES = {
+    "C": ["Complete percentage", "Complete"],
+    "S": ["Single copy percentage", "Single copy"],
+    "D": ["Multi copy percentage", "Multi copy"],
+    "F": ["Fragmented percentage", "Fragmented"],
+    "M": ["Missing percentage", "Missing"],
+}
+JSON_COUNTS = {
+    "C": "Complete BUSCOs",
+    "S": "Single copy BUSCOs",
+    "D": "Multi copy BUSCOs",
+    "F": "Fragmented BUSCOs",
+    "M": "Missing BUSCOs",
+}
+
+
+@dataclass(frozen=True)
+class BuscoSummary:
+    version: Optional[str] = None
+    lineage: Optional[str] = None  # lineage dataset, e.g. "vertebrata_odb10"
+    genomes: Optional[int] = None  # genomes (or species) the dataset was built from
+    buscos: Optional[int] = None  # BUSCOs in the dataset (n)
+    complete: Optional[float] = None  # percentages of n
+    single: Optional[float] = None
+    duplicated: Optional[float] = None
+    fragmented: Optional[float] = None
+    missing: Optional[float] = None
+    complete_count: Optional[int] = None
+    single_count: Optional[int] = None
+    duplicated_count: Optional[int] = None
+    fragmented_count: Optional[int] = None
+    missing_count: Optional[int] = None
+
+    # S, D, F, M percentages, None if the summary has no results line
+    @property
+    def scores(self):
+        if self.single is None:
+            return None
+        return (self.single, self.duplicated, self.fragmented, self.missing)
+
+    # what must match across results to report one BUSCO version and lineage
+    @property
+    def dataset(self):
+        if self.version is None or self.lineage is None:
+            return None
+        return (self.version, self.lineage, self.genomes, self.buscos)
+
+
+# parse the text short summary in one pass over its lines
+def parse_busco_text(lines):
+    fields = {}
+    for line in lines:
+        if line.startswith("#"):
+            match = VERSION_RE.search(line)
+            if match:
+                fields["version"] = match.group(1)
+            match = LINEAGE_RE.search(line)
+            if match:
+                fields["lineage"] = match.group(1)
+                fields["genomes"] = int(match.group(2))
+                fields["buscos"] = int(match.group(3))
+        elif "single" not in fields and RESULTS_RE.search(line):
+            for letter, value in SCORE_RE.findall(line):
+                fields[SCORE_FIELDS[letter][0]] = float(value)
+        else:
+            match = COUNT_RE.match(line)
+            if match:
+                fields[SCORE_FIELDS[match.group(2)][1]] = int(match.group(1))
+    return BuscoSummary(**fields)
+
+
+# parse the JSON short summary of BUSCO 5
+def parse_busco_json(data):
+    dataset = data.get("lineage_dataset") or {}
+    results = data.get("results") or {}
+    fields = {
+        "version": (data.get("versions") or {}).get("busco"),
+        "lineage": dataset.get("name"),
+    }
+    for field, key in [
+        ("genomes", "number_of_species"),
+        ("buscos", "number_of_buscos"),
+    ]:
+        if dataset.get(key) is not None:
+            fields[field] = int(dataset[key])
+
+    for letter, (percentage_field, count_field) in SCORE_FIELDS.items():
+        for key in JSON_PERCENTAGES[letter]:
+            if results.get(key) is not None:
+                fields[percentage_field] = float(results[key])
+                break
+        if results.get(JSON_COUNTS[letter]) is not None:
+            fields[count_field] = int(results[JSON_COUNTS[letter]])
+
+    # older JSON files only have the percentages in the one line summary
+    if "single" not in fields and results.get("one_line_summary"):
+        for letter, value in SCORE_RE.findall(results["one_line_summary"]):
+            fields[SCORE_FIELDS[letter][0]] = float(value)
+    if "buscos" not in fields and results.get("n_markers") is not None:
+        fields["buscos"] = int(results["n_markers"])
+    return BuscoSummary(**fields)
+
+
+# summaries already parsed in this process, keyed by real path
+_summary_cache = {}
+
+
+# read a BUSCO short summary (text or JSON), reusing the parsed record while the file
+# is unchanged
+def read_busco_summary(path):
+    real_path = os.path.realpath(path)
+    stamp = bundles.stamp(real_path)
+
+    cached = _summary_cache.get(real_path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with bundles.open_input(real_path) as file:
+        content = file.read()
+    if content.lstrip().startswith("{"):
+        try:
+            summary = parse_busco_json(json.loads(content))
+        except (ValueError, TypeError, AttributeError) as e:
+            raise ValueError(f"Invalid BUSCO JSON short summary {path}: {str(e)}")
+    else:
+        summary = parse_busco_text(content.splitlines())
+    _summary_cache[real_path] = (stamp, summary)
+    return summary
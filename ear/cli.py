@@ -0,0 +1,210 @@
+# ear/cli.py
+# ERGA Sequencing and Assembly Committee
+# Command line shared by make_EAR.py and glxy/make_EAR_glxy.py, which only differ in
+# their EAR version and in how their YAML files name the input files (ear/resolvers.py)
+
+import argparse
+import logging
+import os
+import sys
+from contextlib import nullcontext
+
+from . import bundles
+from .batch import YAML_EXTENSIONS, collect_yaml_files, run_batch
+from .build_cache import DEFAULT_BUILD_CACHE_DIR, BuildCache
+from .goat import DEFAULT_CACHE_DIR, DEFAULT_TTL_DAYS, GoatClient
+from .images import DEFAULT_DPI, DEFAULT_IMAGE_CACHE_DIR, ImagePreprocessor
+from .model import EARError
+from .pdf_size import parse_size
+from .profiling import TRACE_FILENAME, Profiler, save_profile
+from .report import make_report
+from .validate import print_problems, validate_yaml
+
+
+def main(ear_version, resolver, argv=None):
+    parser = argparse.ArgumentParser(
+        description="Create an ERGA Assembly Report (EAR) from a YAML file. Visit https://github.com/ERGA-consortium/EARs for more information"
+    )
+    parser.add_argument(
+        "yaml_file",
+        type=str,
+        nargs="+",
+        help="Path to the YAML file, or an EAR bundle (.tar(.gz), .zip) holding the YAML file and its inputs. Several YAML files, folders of YAML files or manifests (text files listing one YAML path per line) run in batch mode. Input paths may point into archives (e.g. merqury.tar.gz/out.qv) and to .gz files",
+    )
+    parser.add_argument(
+        "-o",
+        "--outdir",
+        type=str,
+        default=".",
+        help="Output folder for the PDF and EAR.log. In batch mode each YAML gets its own subfolder (default: current folder)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes in batch mode (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Do not contact GoaT, use only cached or snapshot responses",
+    )
+    parser.add_argument(
+        "--goat-cache",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory for cached GoaT responses (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--goat-ttl",
+        type=float,
+        default=DEFAULT_TTL_DAYS,
+        help=f"Days before a cached GoaT response is fetched again (default: {DEFAULT_TTL_DAYS})",
+    )
+    parser.add_argument(
+        "--goat-snapshot",
+        type=str,
+        help="JSON file with pre-seeded GoaT responses, as written by --goat-save-snapshot",
+    )
+    parser.add_argument(
+        "--goat-save-snapshot",
+        type=str,
+        help="Add the GoaT responses for this species to a snapshot JSON file",
+    )
+    parser.add_argument(
+        "--image-dpi",
+        type=int,
+        default=DEFAULT_DPI,
+        help=f"Resolution the images are downsampled to for their size in the PDF, 0 keeps the original images (default: {DEFAULT_DPI})",
+    )
+    parser.add_argument(
+        "--jpeg-quality",
+        type=int,
+        choices=range(1, 96),
+        metavar="[1-95]",
+        help="Recompress the images as JPEG with this quality instead of lossless PNG",
+    )
+    parser.add_argument(
+        "--max-size",
+        type=parse_size,
+        help="Size budget for the PDF, e.g. 10M or 800K (plain numbers are MB): the images are re-encoded as JPEG of decreasing quality, then resolution, until the PDF fits, and the size of each section is written to EAR.log",
+    )
+    parser.add_argument(
+        "--image-cache",
+        type=str,
+        default=DEFAULT_IMAGE_CACHE_DIR,
+        help=f"Directory for the downsampled images, keyed by the content of the source image and the size it is drawn at, shared by all EARs (default: {DEFAULT_IMAGE_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--no-image-cache",
+        action="store_true",
+        help="Always downsample the images again, and don't store them in the image cache",
+    )
+    parser.add_argument(
+        "--build-cache",
+        type=str,
+        default=DEFAULT_BUILD_CACHE_DIR,
+        help=f"Directory for finished EARs and parsed inputs, keyed by the content of the YAML and its input files; an EAR whose inputs and GoaT taxonomy are unchanged is copied from here, with the date and time of its first build (default: {DEFAULT_BUILD_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--no-build-cache",
+        action="store_true",
+        help="Always build the EAR, and don't store it in the build cache",
+    )
+    parser.add_argument(
+        "--validate-only",
+        action="store_true",
+        help="Only check the YAML file(s) and their input files, and report all problems found, without building the PDF",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Report the wall time and peak memory of each stage of the run (YAML, GoaT, parsers, PDF sections and build), in batch mode to each EAR.log",
+    )
+    parser.add_argument(
+        "--profile-trace",
+        action="store_true",
+        help=f"With --profile, also write the stages as Chrome trace events to {TRACE_FILENAME} next to EAR.log",
+    )
+    args = parser.parse_args(argv)
+    args.profile = args.profile or args.profile_trace
+
+    if args.validate_only:
+        failed = 0
+        for yaml_file in collect_yaml_files(args.yaml_file):
+            problems = validate_yaml(yaml_file, resolver)
+            print_problems(yaml_file, problems)
+            failed += bool(problems.errors)
+        sys.exit(1 if failed else 0)
+
+    goat_client = GoatClient(
+        cache_dir=args.goat_cache,
+        ttl_days=args.goat_ttl,
+        offline=args.offline,
+        snapshot=args.goat_snapshot,
+    )
+    image_preprocessor = ImagePreprocessor(
+        dpi=args.image_dpi,
+        jpeg_quality=args.jpeg_quality,
+        cache_dir=None if args.no_image_cache else args.image_cache,
+    )
+    build_cache = None if args.no_build_cache else BuildCache(args.build_cache)
+
+    os.makedirs(args.outdir, exist_ok=True)
+    yaml_files = collect_yaml_files(args.yaml_file)
+    if len(args.yaml_file) == 1 and (
+        args.yaml_file[0].endswith(YAML_EXTENSIONS)
+        or (bundles.is_archive(args.yaml_file[0]) and len(yaml_files) == 1)
+    ):
+        logging.basicConfig(
+            filename=os.path.join(args.outdir, "EAR.log"), level=logging.INFO
+        )
+        profiler = Profiler() if args.profile else nullcontext()
+        try:
+            with profiler:
+                make_report(
+                    yaml_files[0],
+                    ear_version,
+                    goat_client,
+                    output_dir=args.outdir,
+                    image_preprocessor=image_preprocessor,
+                    build_cache=build_cache,
+                    resolver=resolver,
+                    max_size=args.max_size,
+                )
+        except EARError as e:
+            logging.error(str(e))
+            sys.exit(1)
+        finally:
+            if args.profile:
+                print(save_profile(profiler, args.outdir, args.profile_trace))
+        done_files = yaml_files
+    else:
+        results = run_batch(
+            make_report,
+            yaml_files,
+            args.outdir,
+            args.jobs,
+            profile=args.profile,
+            trace=args.profile_trace,
+            ear_version=ear_version,
+            goat_client=goat_client,
+            image_preprocessor=image_preprocessor,
+            build_cache=build_cache,
+            resolver=resolver,
+            max_size=args.max_size,
+        )
+        done_files = [yaml_file for yaml_file, ok, _, _ in results if ok]
+
+    if args.goat_save_snapshot:
+        import yaml
+
+        species_list = []
+        for yaml_file in done_files:
+            with bundles.open_input(yaml_file) as file:
+                species_list.append(yaml.safe_load(file)["Species"])
+        goat_client.save_snapshot(species_list, args.goat_save_snapshot)
+
+    if len(done_files) < len(yaml_files):
+        sys.exit(1)
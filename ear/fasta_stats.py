@@ -0,0 +1,176 @@
+# ear/fasta_stats.py
+# ERGA Sequencing and Assembly Committee
+# Assembly statistics computed from the FASTA itself, for assemblies without a gfastats
+# --nstar-report: one pass over fixed-size chunks of the (gzipped) file, memory-mapped
+# when it is a plain file, with the bases counted by numpy on whole chunks and the gaps
+# found by bytes.find. Only the scaffold and contig lengths are kept.
+
+import mmap
+import os
+import re
+from array import array
+
+from . import bundles
+from .gfastats import lengths_report
+
+CHUNK_SIZE = 16 * 1024 * 1024
+
+# byte classes counted per chunk: 0 white space, 1 G/C, 2 A/T, 3 any other base
+_WHITESPACE = b" \t\r\n\v\f"
+_CLASSES = bytes(
+    0 if byte in _WHITESPACE else 1 if byte in b"GCgc" else 2 if byte in b"ATat" else 3
+    for byte in range(256)
+)
+# gaps are runs of N or n
+_GAP_CASE = bytes.maketrans(b"n", b"N")
+_NOT_N_RE = re.compile(rb"[^N]")
+
+
+# lengths of the scaffolds and contigs (the stretches between runs of N) of a FASTA
+# stream, with base and gap counts
+class FastaScanner:
+    def __init__(self):
+        self.scaffolds = array("q")
+        self.contigs = array("q")
+        self.gc = 0
+        self.at = 0
+        self.gaps = 0
+        self.gap_bp = 0
+        self._in_header = False
+        self._in_record = False
+        self._scaffold = 0
+        self._contig = 0
+        self._gap = 0  # length of the run of N being read, 0 outside gaps
+
+    def feed(self, chunk):
+        pos = 0
+        size = len(chunk)
+        while pos < size:
+            if self._in_header:
+                end = chunk.find(b"\n", pos)
+                if end == -1:
+                    return
+                self._in_header = False
+                pos = end + 1
+                continue
+            header = chunk.find(b">", pos)
+            if header == -1:
+                self._sequence(chunk[pos:])
+                return
+            self._sequence(chunk[pos:header])
+            self._end_record()
+            self._in_header = self._in_record = True
+            pos = header + 1
+
+    def close(self):
+        self._end_record()
+
+    def _sequence(self, data):
+        import numpy as np
+
+        classes = np.frombuffer(data.translate(_CLASSES), dtype=np.uint8)
+        length = int(np.count_nonzero(classes))
+        if not length:
+            return
+        if not self._in_record:
+            raise ValueError("Sequence data before the first FASTA header")
+        self._scaffold += length
+        self.gc += int(np.count_nonzero(classes == 1))
+        self.at += int(np.count_nonzero(classes == 2))
+
+        if data.find(b"N") == -1 and data.find(b"n") == -1:
+            self._bases(length)
+            return
+        sequence = data.translate(_GAP_CASE, _WHITESPACE)
+        pos = 0
+        while True:
+            start = sequence.find(b"N", pos)
+            if start == -1:
+                self._bases(len(sequence) - pos)
+                return
+            self._bases(start - pos)
+            match = _NOT_N_RE.search(sequence, start)
+            pos = match.start() if match else len(sequence)
+            if not self._gap and self._contig:
+                self.contigs.append(self._contig)
+                self._contig = 0
+            self._gap += pos - start
+            if not match:
+                return
+
+    def _bases(self, length):
+        if not length:
+            return
+        if self._gap:
+            self._close_gap()
+        self._contig += length
+
+    def _close_gap(self):
+        self.gaps += 1
+        self.gap_bp += self._gap
+        self._gap = 0
+
+    def _end_record(self):
+        if not self._in_record:
+            return
+        if self._gap:
+            self._close_gap()
+        if self._contig:
+            self.contigs.append(self._contig)
+        self.scaffolds.append(self._scaffold)
+        self._scaffold = self._contig = 0
+
+
+def _chunks(path):
+    if bundles.split_path(path)[1] is None and not path.endswith(".gz"):
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for start in range(0, len(data), CHUNK_SIZE):
+                    yield data[start : start + CHUNK_SIZE]
+        return
+    with bundles.open_input(path, "rb") as file:
+        while True:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+# the statistics of a gfastats --nstar-report for a FASTA file (plain or .gz, may be in
+# an archive), with the scaffold and contig Nx curves
+def compute_fasta_stats(path):
+    scanner = FastaScanner()
+    for chunk in _chunks(path):
+        scanner.feed(chunk)
+    scanner.close()
+    if not scanner.scaffolds:
+        raise ValueError(f"No sequences in {path}")
+
+    bases = scanner.gc + scanner.at
+    return lengths_report(
+        scanner.scaffolds,
+        scanner.contigs,
+        scanner.gaps,
+        scanner.gap_bp,
+        gc_percent=round(scanner.gc / bases * 100, 2) if bases else 0.0,
+    )
+
+
+# statistics already computed in this process, keyed by real path
+_stats_cache = {}
+
+
+# compute the statistics of a FASTA file, reusing them while the file is unchanged
+def read_fasta_stats(path):
+    real_path = os.path.realpath(path)
+    stamp = bundles.stamp(real_path)
+
+    cached = _stats_cache.get(real_path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    report = compute_fasta_stats(real_path)
+    _stats_cache[real_path] = (stamp, report)
+    return report
@@ -0,0 +1,38 @@
+# ear/genome_profile.py
+# ERGA Sequencing and Assembly Committee
+# Readers for GenomeScope and Smudgeplot summaries
+
+import re
+
+from . import bundles
+from .model import EARError
+
+
+# first file matching pattern in folder
+def find_summary(folder, pattern, tool):
+    matches = bundles.glob(folder, pattern)
+    if not matches:
+        raise EARError(f"# {tool} results folder has no {pattern} file: {folder}")
+    return matches[0]
+
+
+# haploid length and ploidy from a GenomeScope summary.txt, ploidy "NA" when it is not there
+def read_genomescope_summary(summary_file):
+    with bundles.open_input(summary_file) as f:
+        summary_txt = f.read()
+
+    length_match = re.search(r"Genome Haploid Length\s+([\d,]+) bp", summary_txt)
+    if not length_match:
+        raise EARError(f"No haploid length found in {summary_file}")
+    ploidy_match = re.search(r"p = (\d+)", summary_txt)
+    return length_match.group(1), ploidy_match.group(1) if ploidy_match else "NA"
+
+
+# proposed ploidy from a Smudgeplot verbose_summary.txt, None if it is not there
+def read_smudgeplot_ploidy(summary_file):
+    proposed_ploidy = None
+    with bundles.open_input(summary_file) as f:
+        for line in f:
+            if line.startswith("* Proposed ploidy"):
+                proposed_ploidy = line.split(":")[1].strip()
+    return proposed_ploidy
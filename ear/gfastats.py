@@ -0,0 +1,143 @@
+# ear/gfastats.py
+# ERGA Sequencing and Assembly Committee
+# Single-pass parser for gfastats --nstar-report output
+
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from . import bundles
+
+# gfastats report label -> (record field, type)
+GFASTATS_FIELDS = {
+    "Total scaffold length": ("total_bp", int),
+    "GC content %": ("gc_percent", float),
+    "# gaps in scaffolds": ("gaps", int),
+    "Total gap length in scaffolds": ("gap_bp", int),
+    "# scaffolds": ("scaffolds", int),
+    "Scaffold N50": ("scaffold_n50", int),
+    "Scaffold L50": ("scaffold_l50", int),
+    "Scaffold L90": ("scaffold_l90", int),
+    "# contigs": ("contigs", int),
+    "Contig N50": ("contig_n50", int),
+    "Contig L50": ("contig_l50", int),
+    "Contig L90": ("contig_l90", int),
+}
+
+
+@dataclass(frozen=True)
+class GfastatsReport:
+    total_bp: int
+    gc_percent: Optional[float]  # None when computed without the sequence
+    gaps: int
+    gap_bp: int
+    scaffolds: int
+    scaffold_n50: int
+    scaffold_l50: int
+    scaffold_l90: int
+    contigs: int
+    contig_n50: int
+    contig_l50: int
+    contig_l90: int
+    # N1..N100, only when computed from the FASTA (see ear/fasta_stats.py)
+    scaffold_nx: Optional[Tuple[int, ...]] = None
+    contig_nx: Optional[Tuple[int, ...]] = None
+    # % of the length in chromosome-assigned scaffolds, only from .fai and AGP (see
+    # ear/agp.py)
+    chromosome_percent: Optional[float] = None
+
+    # get a value by its gfastats report label (e.g. "Scaffold N50")
+    def get(self, label):
+        return getattr(self, GFASTATS_FIELDS[label][0])
+
+    # get the values for a list of report labels, in the same order
+    def values(self, labels):
+        return [self.get(label) for label in labels]
+
+    @property
+    def gaps_per_gbp(self):
+        return round(self.gaps / self.total_bp * 1_000_000_000, 2)
+
+
+# N1..N100 of a set of sequence lengths, and their L50 and L90
+def nx_curve(lengths):
+    lengths = sorted(lengths, reverse=True)
+    total = sum(lengths)
+    curve = []
+    lx = {}
+    cumulative = 0
+    count = 0
+    for x in range(1, 101):
+        while count < len(lengths) and cumulative * 100 < total * x:
+            cumulative += lengths[count]
+            count += 1
+        curve.append(lengths[count - 1] if count else 0)
+        lx[x] = count
+    return tuple(curve), lx[50], lx[90]
+
+
+# the report of an assembly given the lengths of its scaffolds and contigs, as computed
+# by gfastats, with the Nx curves; gc_percent is None when the sequence was not read
+def lengths_report(scaffolds, contigs, gaps, gap_bp, gc_percent=None, **fields):
+    scaffold_nx, scaffold_l50, scaffold_l90 = nx_curve(scaffolds)
+    contig_nx, contig_l50, contig_l90 = nx_curve(contigs)
+    return GfastatsReport(
+        total_bp=sum(scaffolds),
+        gc_percent=gc_percent,
+        gaps=gaps,
+        gap_bp=gap_bp,
+        scaffolds=len(scaffolds),
+        scaffold_n50=scaffold_nx[49],
+        scaffold_l50=scaffold_l50,
+        scaffold_l90=scaffold_l90,
+        contigs=len(contigs),
+        contig_n50=contig_nx[49],
+        contig_l50=contig_l50,
+        contig_l90=contig_l90,
+        scaffold_nx=scaffold_nx,
+        contig_nx=contig_nx,
+        **fields,
+    )
+
+
+# parse the text of a gfastats report in one pass over its lines
+def parse_gfastats_report(lines, source="gfastats report"):
+    fields = {}
+    for line in lines:
+        label, sep, value = line.partition(": ")
+        # first occurrence wins, as the report may repeat labels in later blocks
+        if sep and label in GFASTATS_FIELDS and GFASTATS_FIELDS[label][0] not in fields:
+            name, cast = GFASTATS_FIELDS[label]
+            try:
+                fields[name] = cast(value.strip().replace(",", ""))
+            except ValueError:
+                raise ValueError(
+                    f"Invalid value for '{label}' in {source}: {value.strip()}"
+                )
+
+    missing = [
+        label for label, (name, _) in GFASTATS_FIELDS.items() if name not in fields
+    ]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)} in {source}")
+
+    return GfastatsReport(**fields)
+
+
+# reports already parsed in this process, keyed by real path
+_report_cache = {}
+
+
+# read a gfastats report, reusing the parsed record while the file is unchanged
+def read_gfastats_report(path):
+    real_path = os.path.realpath(path)
+    stamp = bundles.stamp(real_path)
+
+    cached = _report_cache.get(real_path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with bundles.open_input(real_path) as file:
+        report = parse_gfastats_report(file, path)
+    _report_cache[real_path] = (stamp, report)
+    return report
@@ -0,0 +1,144 @@
+# ear/goat.py
+# ERGA Sequencing and Assembly Committee
+# GoaT (Genomes on a Tree) lookups with an on-disk response cache
+
+import json
+import logging
+import os
+import time
+from urllib.parse import quote
+
+from .model import EARError
+
+# EAR_GOAT_API points the scripts at another GoaT server, e.g. the benchmark stub
+GOAT_API = os.environ.get("EAR_GOAT_API", "https://goat.genomehubs.org/api/v2")
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "EAR", "goat"
+)
+DEFAULT_TTL_DAYS = 30
+# the list in a response that is empty when GoaT found nothing
+RESULT_KEYS = {"search": "results", "record": "records"}
+
+
+# an EARError, so that a failed lookup ends the EAR with a logged error
+class GoatError(EARError):
+    pass
+
+
+class GoatClient:
+    # cache_dir: where responses are stored, one JSON file per query
+    # ttl_days: age after which a cached response is fetched again
+    # offline: never touch the network, serve from the cache or the snapshot only
+    # snapshot: JSON file with pre-seeded responses, as written by save_snapshot:
+    #     {"search": {"<species>": <search response>},
+    #      "record": {"<taxon id>": <record response>}}
+    def __init__(
+        self,
+        cache_dir=DEFAULT_CACHE_DIR,
+        ttl_days=DEFAULT_TTL_DAYS,
+        offline=False,
+        snapshot=None,
+        timeout=30,
+    ):
+        self.cache_dir = cache_dir
+        self.ttl = ttl_days * 86400
+        self.offline = offline
+        self.timeout = timeout
+        self.snapshot = {"search": {}, "record": {}}
+        if snapshot:
+            with open(snapshot, "r") as file:
+                data = json.load(file)
+            for kind in self.snapshot:
+                self.snapshot[kind].update(
+                    {str(key): value for key, value in data.get(kind, {}).items()}
+                )
+        self._session = None
+
+    # search response for a species name
+    def search(self, species):
+        url = f"{GOAT_API}/search?query=tax_name%28{quote(species)}%29&result=taxon"
+        return self._get("search", species, url)
+
+    # record response for a taxon id
+    def record(self, taxon_id):
+        url = f"{GOAT_API}/record?recordId={taxon_id}&result=taxon&taxonomy=ncbi"
+        return self._get("record", str(taxon_id), url)
+
+    def _cache_path(self, kind, key):
+        return os.path.join(self.cache_dir, kind, quote(key, safe="") + ".json")
+
+    def _read_cache(self, kind, key):
+        try:
+            with open(self._cache_path(kind, key), "r") as file:
+                entry = json.load(file)
+            return entry["fetched"], entry["data"]
+        except (OSError, ValueError, KeyError):
+            return None, None
+
+    def _write_cache(self, kind, key, data):
+        path = self._cache_path(kind, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # write then rename, so concurrent runs never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as file:
+                json.dump({"fetched": time.time(), "data": data}, file)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not write GoaT cache {path}: {str(e)}")
+
+    def _fetch(self, url):
+        import requests
+
+        if self._session is None:
+            self._session = requests.Session()
+        response = self._session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _get(self, kind, key, url):
+        fetched, data = self._read_cache(kind, key)
+        if data is not None and (self.offline or time.time() - fetched < self.ttl):
+            return data
+
+        if not self.offline:
+            try:
+                fresh = self._fetch(url)
+                if fresh.get(RESULT_KEYS[kind]):
+                    self._write_cache(kind, key, fresh)
+                    return fresh
+                # an empty answer may be a transient GoaT problem: it is not cached, so
+                # it is asked again next time, and a stored response is used if any
+                if data is None and key not in self.snapshot[kind]:
+                    return fresh
+                logging.warning(
+                    f"GoaT {kind} for '{key}' found nothing, using stored response"
+                )
+            except Exception as e:
+                if data is None and key not in self.snapshot[kind]:
+                    raise GoatError(f"GoaT {kind} for '{key}' failed: {str(e)}")
+                logging.warning(
+                    f"GoaT {kind} for '{key}' failed, using stored response: {str(e)}"
+                )
+
+        if data is not None:
+            return data
+        if key in self.snapshot[kind]:
+            return self.snapshot[kind][key]
+        raise GoatError(
+            f"GoaT {kind} for '{key}' is not in the cache or the snapshot (offline mode)"
+        )
+
+    # add the responses for the given species to a snapshot file
+    def save_snapshot(self, species_list, snapshot_file):
+        snapshot = {"search": {}, "record": {}}
+        if os.path.exists(snapshot_file):
+            with open(snapshot_file, "r") as file:
+                snapshot.update(json.load(file))
+        for species in species_list:
+            search = self.search(species)
+            taxon_id = str(search["results"][0]["result"]["taxon_id"])
+            snapshot["search"][species] = search
+            snapshot["record"][taxon_id] = self.record(taxon_id)
+        with open(snapshot_file, "w") as file:
+            json.dump(snapshot, file, indent=1)
@@ -0,0 +1,132 @@
+# ear/hic.py
+# ERGA Sequencing and Assembly Committee
+# Genome-wide Hi-C contact map drawn from a cooler file (.cool, or the coarsest fitting
+# resolution of a .mcool) at the pixel size it is placed at: the pixel table is read in
+# chunks and summed into the output grid with numpy, so memory depends on the image and
+# not on the matrix. h5py is only needed when a cooler file is given.
+
+import zipfile
+from contextlib import contextmanager
+
+from . import bundles
+from .model import EARError
+
+COOLER_SUFFIXES = (".mcool", ".cool")
+PIXEL_CHUNK = 1_000_000
+# the log-scaled counts saturate at this quantile of the non-empty pixels
+COLOR_QUANTILE = 0.995
+# white to red, as PretextSnapshot's default maps, with grey scaffold boundaries
+MAP_COLOR = (255, 0, 0)
+BOUNDARY_COLOR = (160, 160, 160)
+# scaffolds narrower than this many pixels get no boundary lines
+MIN_BOUNDARY_PIXELS = 4
+
+
+def is_cooler(path):
+    return path.lower().endswith(COOLER_SUFFIXES)
+
+
+# the open HDF5 file of a cooler; in a bundle it is read in place from a zip member, as
+# tar members can only be read through in order
+@contextmanager
+def open_cooler(path):
+    try:
+        import h5py
+    except ImportError:
+        raise ValueError(f"h5py is needed to read the Hi-C contact map {path}")
+
+    archive_path, member = bundles.split_path(path)
+    if member is None:
+        with h5py.File(path, "r") as file:
+            yield file
+        return
+    if not zipfile.is_zipfile(archive_path):
+        raise EARError(
+            f"The Hi-C contact map {path} must be extracted from {archive_path} or the bundle zipped, tar archives cannot be read from at random"
+        )
+    with bundles.open_input(path, "rb") as member_file:
+        with h5py.File(member_file, "r") as file:
+            yield file
+
+
+# the cooler group of a .cool, or of the coarsest resolution of a .mcool with at least
+# pixels bins (the finest when none has as many)
+def select_resolution(file, pixels):
+    if "resolutions" not in file:
+        return file
+    groups = {int(name): group for name, group in file["resolutions"].items()}
+    if not groups:
+        raise ValueError(f"No resolutions in {file.filename}")
+    fitting = [
+        res for res, group in groups.items() if len(group["bins/chrom"]) >= pixels
+    ]
+    return groups[max(fitting) if fitting else min(groups)]
+
+
+# size x size summed contact counts of a cooler group, both triangles filled
+def contact_grid(group, size):
+    import numpy as np
+
+    n_bins = len(group["bins/chrom"])
+    bin1, bin2, count = (
+        group[f"pixels/{name}"] for name in ["bin1_id", "bin2_id", "count"]
+    )
+    grid = np.zeros(size * size)
+    for start in range(0, len(count), PIXEL_CHUNK):
+        end = start + PIXEL_CHUNK
+        rows = bin1[start:end].astype(np.int64) * size // n_bins
+        columns = bin2[start:end].astype(np.int64) * size // n_bins
+        weights = count[start:end].astype(np.float64)
+        grid += np.bincount(
+            rows * size + columns, weights=weights, minlength=size * size
+        )
+        # cooler stores the upper triangle only
+        lower = rows != columns
+        grid += np.bincount(
+            columns[lower] * size + rows[lower],
+            weights=weights[lower],
+            minlength=size * size,
+        )
+    return grid.reshape(size, size)
+
+
+# pixel positions where the scaffolds of a cooler group start, the first one excepted
+def scaffold_boundaries(group, size):
+    import numpy as np
+
+    n_bins = len(group["bins/chrom"])
+    if "indexes/chrom_offset" in group:
+        offsets = group["indexes/chrom_offset"][:].astype(np.int64)
+    else:
+        chroms = group["bins/chrom"][:]
+        offsets = np.concatenate(([0], np.flatnonzero(np.diff(chroms)) + 1, [n_bins]))
+    pixels = offsets * size // n_bins
+    wide = np.diff(pixels) >= MIN_BOUNDARY_PIXELS
+    return [int(pixel) for pixel in pixels[:-1][wide] if pixel > 0]
+
+
+# an RGB PIL image of the genome-wide contact map of a cooler file, width x height pixels
+def contact_map_image(path, width, height):
+    import numpy as np
+    from PIL import Image as PILImage
+
+    size = max(width, height)
+    with open_cooler(path) as file:
+        group = select_resolution(file, size)
+        size = min(size, len(group["bins/chrom"]))
+        grid = np.log1p(contact_grid(group, size))
+        boundaries = scaffold_boundaries(group, size)
+
+    filled = grid[grid > 0]
+    top = np.quantile(filled, COLOR_QUANTILE) if len(filled) else 1.0
+    intensity = np.clip(grid / (top or 1.0), 0, 1)[..., None]
+    white = np.array([255, 255, 255], dtype=np.float64)
+    pixels = (white + (np.array(MAP_COLOR) - white) * intensity).astype(np.uint8)
+    for boundary in boundaries:
+        pixels[boundary, :] = BOUNDARY_COLOR
+        pixels[:, boundary] = BOUNDARY_COLOR
+
+    img = PILImage.fromarray(pixels, "RGB")
+    if img.size != (width, height):
+        img = img.resize((width, height), PILImage.NEAREST)
+    return img
@@ -0,0 +1,163 @@
+# ear/images.py
+# ERGA Sequencing and Assembly Committee
+# Resample report images to the resolution of their placed size before embedding, and
+# keep the results in an on-disk cache keyed by source content and target size
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from . import bundles
+from .hic import contact_map_image, is_cooler
+
+DEFAULT_DPI = 200
+POINTS_PER_INCH = 72
+DEFAULT_IMAGE_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "EAR", "images"
+)
+
+
+# pixel size needed to draw an image of width x height points at dpi
+def target_pixels(width, height, dpi):
+    return (
+        max(1, round(width / POINTS_PER_INCH * dpi)),
+        max(1, round(height / POINTS_PER_INCH * dpi)),
+    )
+
+
+# downsample an image to its placed size and re-encode it as PNG (Flate) or JPEG
+# returns the encoded bytes, or None when the original file is already as small; Hi-C
+# cooler files are drawn at the placed size (at DEFAULT_DPI when dpi is 0)
+def prepare_image(path, width, height, dpi=DEFAULT_DPI, jpeg_quality=None):
+    from PIL import Image as PILImage
+
+    if is_cooler(path):
+        target_size = target_pixels(width, height, dpi or DEFAULT_DPI)
+        return encode_image(contact_map_image(path, *target_size), jpeg_quality)
+
+    with bundles.open_input(path, "rb") as file, PILImage.open(file) as img:
+        target_size = target_pixels(width, height, dpi)
+        resample = img.width > target_size[0] or img.height > target_size[1]
+        if not resample and jpeg_quality is None:
+            return None
+
+        img.load()
+        if resample:
+            # never upsample: keep the source size on an axis that is already smaller
+            img = img.resize(
+                (min(img.width, target_size[0]), min(img.height, target_size[1])),
+                PILImage.LANCZOS,
+            )
+
+        data = encode_image(img, jpeg_quality)
+        # resampling sparse plots can add more colours than it saves pixels
+        if jpeg_quality is None and len(data) >= bundles.getsize(path):
+            return None
+        return data
+
+
+# a PIL image as PNG (Flate) bytes, or JPEG with jpeg_quality
+def encode_image(img, jpeg_quality=None):
+    from PIL import Image as PILImage
+
+    output = BytesIO()
+    if jpeg_quality is not None:
+        if img.mode in ("RGBA", "LA", "P"):
+            # JPEG has no alpha channel, flatten onto white as in the PDF page
+            img = img.convert("RGBA")
+            background = PILImage.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel("A"))
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+        img.save(output, format="JPEG", quality=jpeg_quality, optimize=True)
+    else:
+        img.save(output, format="PNG")
+    return output.getvalue()
+
+
+class ImagePreprocessor:
+    # cache_dir: where prepared images are stored, shared by all runs and batch workers;
+    # None prepares every image again
+    def __init__(
+        self, dpi=DEFAULT_DPI, jpeg_quality=None, workers=None, cache_dir=None
+    ):
+        self.dpi = dpi
+        self.jpeg_quality = jpeg_quality
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.prepared = {}  # (path, width, height) -> bytes or None
+
+    # <sha256 of the source>/<width>x<height>.<png or q<quality>.jpg>: the same image
+    # drawn at the same size gives the same file, whichever EAR and path it comes from
+    def _cache_path(self, path, width, height):
+        pixels = target_pixels(width, height, self.dpi)
+        encoding = "png" if self.jpeg_quality is None else f"q{self.jpeg_quality}.jpg"
+        return os.path.join(
+            self.cache_dir,
+            bundles.sha256_file(path),
+            f"{pixels[0]}x{pixels[1]}.{encoding}",
+        )
+
+    # an empty cache file stands for "embed the original", as prepare_image's None
+    def _read_cache(self, cache_path):
+        try:
+            with open(cache_path, "rb") as file:
+                return file.read() or None, True
+        except OSError:
+            return None, False
+
+    def _write_cache(self, cache_path, data):
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            # write then rename, so concurrent runs never see a partial file
+            tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(data or b"")
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logging.warning(f"Could not write image cache {cache_path}: {str(e)}")
+
+    def _prepare(self, key):
+        path, width, height = key
+        try:
+            cache_path = None
+            # hashing a whole cooler file would cost more than drawing its coarse map
+            if self.cache_dir and not is_cooler(path):
+                cache_path = self._cache_path(path, width, height)
+                data, found = self._read_cache(cache_path)
+                if found:
+                    return data
+            data = prepare_image(path, width, height, self.dpi, self.jpeg_quality)
+            if cache_path:
+                self._write_cache(cache_path, data)
+            return data
+        except Exception as e:
+            logging.warning(f"Could not preprocess image {path}: {str(e)}")
+            return None
+
+    # prepare all (path, width, height) placements in a thread pool; with dpi 0 only the
+    # Hi-C cooler files, which have no image to embed as it is
+    def prepare_all(self, placements):
+        keys = [key for key in dict.fromkeys(placements) if key not in self.prepared]
+        if not self.dpi:
+            keys = [key for key in keys if is_cooler(key[0])]
+        if not keys:
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for key, data in zip(keys, executor.map(self._prepare, keys)):
+                self.prepared[key] = data
+
+    # image source to hand to reportlab: prepared bytes, or the original file; None for
+    # a Hi-C cooler file that could not be drawn
+    def source(self, path, width, height):
+        if is_cooler(path):
+            self.prepare_all([(path, width, height)])
+            data = self.prepared[(path, width, height)]
+            return BytesIO(data) if data is not None else None
+        data = self.prepared.get((path, width, height))
+        if data is None and bundles.split_path(path)[1] is not None:
+            data = bundles.read_bytes(path)
+        return BytesIO(data) if data is not None else path
@@ -0,0 +1,199 @@
+# ear/merqury.py
+# ERGA Sequencing and Assembly Committee
+# One-scan index of a Merqury results folder, or of Merqury output files given one by one
+
+import os
+import re
+from dataclasses import dataclass
+from itertools import islice
+from typing import Optional
+
+from . import bundles
+
+# <out>.spectra-{cn,asm}.{ln,fl,st}.png for the whole run, and
+# <out>.<assembly>.spectra-cn.{ln,fl,st}.png for each assembly of it, and the .hist
+# tables the plots are drawn from (<out>.spectra-cn.hist, ...)
+SPECTRA_RE = re.compile(r"^(.+)\.spectra-(cn|asm)\.(?:(ln|fl|st)\.png|(hist))$")
+# plot scales, preferred first: the table, drawn by the EAR itself (ear/spectra.py),
+# then the PNGs of Merqury: log, filled and stacked
+SPECTRA_SCALES = ["hist", "ln", "fl", "st"]
+
+
+@dataclass(frozen=True)
+class SpectraPlot:
+    path: str
+    plot: str  # "cn": k-mer copy numbers, "asm": k-mers by the assemblies they are in
+    scale: Optional[str] = None  # "hist", "ln", "fl", "st", None if unknown
+    assembly: Optional[str] = None  # assembly of a per-assembly spectra-cn plot
+
+
+# the plot a Merqury output file name stands for, None for other files
+def parse_spectra_name(path, prefix=None):
+    match = SPECTRA_RE.match(os.path.basename(path))
+    if not match:
+        return None
+    stem, plot, scale, table = match.groups()
+    assembly = None
+    if prefix is not None and stem.startswith(prefix + "."):
+        assembly = stem[len(prefix) + 1 :]
+    return SpectraPlot(path, plot, scale or table, assembly)
+
+
+# read at most max_rows tab-separated rows from the top of a file
+def _read_rows(path, max_rows=None):
+    with bundles.open_input(path) as file:
+        return [line.rstrip("\n").split("\t") for line in islice(file, max_rows)]
+
+
+# raise ValueError on the first row with fewer than columns fields
+def _check_columns(path, rows, columns):
+    for number, row in enumerate(rows, 1):
+        if len(row) < columns:
+            raise ValueError(
+                f"Invalid line {number} in {path}: expected {columns} tab-separated columns"
+            )
+
+
+class MerquryResults:
+    def __init__(self, folder=None, qv_files=(), completeness_files=()):
+        self.folder = folder
+        self.qv_tables = []  # assembly-level .qv rows, one list per file
+        self.scaffold_qv_files = []  # per-scaffold .qv files (not read)
+        self.completeness_tables = []  # *completeness.stats rows, one list per file
+        self.spectra_plots = []  # SpectraPlot of each spectra-cn/asm PNG and .hist
+        self._stamps = {}
+        if folder is not None:
+            self._stamps[folder] = bundles.stamp(folder)
+            self._scan()
+        for path in qv_files:
+            self._add_qv(path)
+        for path in completeness_files:
+            self._add_completeness(path)
+
+    def _scan(self):
+        spectra_files = []  # (path, name stem, plot)
+        prefixes = set()
+        for name in bundles.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            # tables may be gzipped, bundles.open_input decompresses them
+            table_name = name[:-3] if name.endswith(".gz") else name
+            spectra_match = SPECTRA_RE.match(name)
+            if table_name.endswith(".qv"):
+                self._add_qv(path)
+            elif table_name.endswith("completeness.stats"):
+                self._add_completeness(path)
+                prefixes.add(table_name[: -len(".completeness.stats")])
+            elif spectra_match:
+                spectra_files.append((path, *spectra_match.groups()[:2]))
+
+        # the output prefix of the run (<out>) tells the plots of the whole run from the
+        # per-assembly ones: the name of its completeness.stats or spectra-asm plots, else
+        # the shortest spectra-cn name
+        prefixes.update(stem for _, stem, plot in spectra_files if plot == "asm")
+        if not prefixes and spectra_files:
+            prefixes.add(min((stem for _, stem, _ in spectra_files), key=len))
+        prefix = min(prefixes, key=len) if prefixes else None
+        self.spectra_plots = [
+            parse_spectra_name(path, prefix) for path, _, _ in spectra_files
+        ]
+
+    def _add_qv(self, path):
+        # the assembly-level table has one row per haplotype plus "Both";
+        # per-scaffold tables can be huge, so only look at their first rows
+        rows = _read_rows(path, 3)
+        self._stamps[path] = bundles.stamp(path)
+        if len(rows) == 1 or (len(rows) == 3 and rows[2][0].strip() == "Both"):
+            # <assembly> <k-mers only in it> <k-mers in both> <QV> <error rate>
+            _check_columns(path, rows, 4)
+            self.qv_tables.append(rows)
+        else:
+            self.scaffold_qv_files.append(path)
+
+    def _add_completeness(self, path):
+        rows = [row for row in _read_rows(path) if any(field.strip() for field in row)]
+        # <assembly> all <k-mers found> <k-mers in the reads> <completeness>
+        _check_columns(path, rows, 5)
+        self.completeness_tables.append(rows)
+        self._stamps[path] = bundles.stamp(path)
+
+    # True while neither the folder listing nor any parsed file has changed
+    def is_current(self):
+        try:
+            return all(
+                bundles.stamp(path) == stamp for path, stamp in self._stamps.items()
+            )
+        except OSError:
+            return False
+
+    # Merqury names of the assemblies, in the order of the assembly-level .qv rows
+    def assembly_names(self):
+        for rows in self.qv_tables:
+            return [row[0] for row in rows if row[0].strip() != "Both"]
+        return []
+
+    # the plot of each kind (per-assembly spectra-cn plots first, in .qv row order, then
+    # the spectra-cn and spectra-asm plots of the whole run), in the first of the scales
+    # it was drawn in
+    def select_spectra(self, scales=SPECTRA_SCALES):
+        selected = {}
+        for plot in self.spectra_plots:
+            key = (plot.plot, plot.assembly)
+            if plot.scale in scales and (
+                key not in selected
+                or scales.index(plot.scale) < scales.index(selected[key].scale)
+            ):
+                selected[key] = plot
+
+        rows = {name: i for i, name in enumerate(self.assembly_names())}
+        per_assembly = sorted(
+            (plot for (_, assembly), plot in selected.items() if assembly),
+            key=lambda plot: (rows.get(plot.assembly, len(rows)), plot.assembly),
+        )
+        whole_run = [
+            selected[key] for key in [("cn", None), ("asm", None)] if key in selected
+        ]
+        return per_assembly + whole_run
+
+    # QV of the assembly at position order (4th column of the assembly-level .qv)
+    def qv(self, order):
+        for rows in self.qv_tables:
+            if len(rows) > order:
+                return rows[order][3]
+        return ""
+
+    # k-mer completeness of the assembly at position order (5th column)
+    def completeness(self, order):
+        for rows in self.completeness_tables:
+            if len(rows) > order:
+                return rows[order][4].strip()
+        return ""
+
+
+# folders already indexed in this process, keyed by real path
+_results_cache = {}
+
+
+# index a Merqury folder, reusing the previous scan while nothing has changed
+def read_merqury_folder(folder):
+    real_path = os.path.realpath(folder)
+    results = _results_cache.get(real_path)
+    if results is None or not results.is_current():
+        results = MerquryResults(real_path)
+        _results_cache[real_path] = results
+    return results
+
+
+# index Merqury output files given by path (e.g. Galaxy datasets, whatever their names)
+def read_merqury_files(qv_file=None, completeness_file=None):
+    key = tuple(
+        os.path.realpath(path) if path else None
+        for path in [qv_file, completeness_file]
+    )
+    results = _results_cache.get(key)
+    if results is None or not results.is_current():
+        results = MerquryResults(
+            qv_files=[key[0]] if key[0] else [],
+            completeness_files=[key[1]] if key[1] else [],
+        )
+        _results_cache[key] = results
+    return results
@@ -0,0 +1,111 @@
+# ear/metrics.py
+# ERGA Sequencing and Assembly Committee
+# Machine-readable metrics document written next to every EAR PDF
+
+import json
+import os
+from dataclasses import asdict
+
+# bump when the layout of the metrics document changes
+METRICS_SCHEMA_VERSION = 2
+
+
+# convert report values like "1,234", "93.5%" or "52.31" to numbers, "" and "NA" to None
+def to_number(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    text = str(value).strip().replace(",", "").rstrip("%")
+    if text in ("", "NA"):
+        return None
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return str(value).strip()
+
+
+# metrics of one assembly (stage and haplotype) from its parsed inputs
+def assembly_metrics(gfastats_report, gaps_per_gbp, qv, completeness, busco_scores):
+    metrics = asdict(gfastats_report) if gfastats_report else {}
+    metrics["gaps_per_gbp"] = to_number(gaps_per_gbp)
+    metrics["qv"] = to_number(qv)
+    metrics["kmer_completeness"] = to_number(completeness)
+    if busco_scores:
+        metrics["busco"] = dict(
+            zip(
+                ["single", "duplicated", "fragmented", "missing"],
+                [to_number(score) for score in busco_scores],
+            )
+        )
+    return metrics
+
+
+def write_metrics(path, metrics):
+    document = {"schema_version": METRICS_SCHEMA_VERSION}
+    document.update(metrics)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(document, file, indent=2)
+    os.replace(tmp_path, path)
+
+
+# the metrics document of a built Report (see ear/report.py)
+def build_metrics_document(report, ear_version):
+    data = report.data
+    sample = data.sample
+    taxonomy = data.taxonomy
+    notes = data.notes
+
+    assemblies = {}
+    for (stage, haplotype), assembly in data.assemblies.items():
+        assemblies.setdefault(stage, {})[haplotype] = assembly_metrics(
+            assembly.gfastats,
+            report.metrics.gaps_per_gbp.get(assembly.key),
+            assembly.qv,
+            assembly.completeness,
+            assembly.busco.scores if assembly.busco else None,
+        )
+
+    return {
+        "EAR_version": ear_version,
+        "generated": report.created.isoformat(),
+        "ToLID": sample.tol_id,
+        "Species": sample.species,
+        "Tags": sample.tags,
+        "taxonomy": {
+            "taxon_id": to_number(taxonomy.taxon_id),
+            "class": taxonomy.class_name,
+            "order": taxonomy.order_name,
+        },
+        "genome_traits": {
+            "expected": {
+                "haploid_size_bp": to_number(data.genome_profile.genome_haploid_length),
+                "haploid_number": to_number(taxonomy.haploid_number),
+                "haploid_number_source": taxonomy.haploid_source,
+                "ploidy": to_number(taxonomy.ploidy),
+                "ploidy_source": taxonomy.ploidy_source,
+                "sex": sample.sex,
+            },
+            "observed": {
+                "haploid_size_bp": to_number(report.metrics.max_total_bp),
+                "haploid_number": to_number(notes.obs_haploid_num),
+                "ploidy": to_number(data.genome_profile.proposed_ploidy),
+                "sex": notes.obs_sex,
+            },
+        },
+        # a list, as the same technology can have several rows (two HiFi runs)
+        "sequencing_data": [
+            {"technology": technology, "coverage": coverage}
+            for technology, coverage in data.sequencing_data
+        ],
+        "assemblies": assemblies,
+        "busco_lineage": report.metrics.busco_lineage,
+        "ebp_metrics": report.metrics.ebp_metrics,
+        "warnings": report.warnings,
+        "curation_notes": {
+            "interventions_per_gb": to_number(notes.interventions_per_gb),
+            "contamination_notes": notes.contamination_notes,
+            "other_notes": notes.other_notes,
+        },
+    }
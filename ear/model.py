@@ -0,0 +1,124 @@
+# ear/model.py
+# ERGA Sequencing and Assembly Committee
+# Data passed between the stages of an EAR (inputs -> metrics -> warnings -> PDF)
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .blobtoolkit import BlobSummary
+from .busco import BuscoSummary
+from .gfastats import GfastatsReport
+from .merqury import SpectraPlot
+
+
+# raised for YAML content or input files make_report cannot work with
+class EARError(Exception):
+    pass
+
+
+@dataclass
+class SampleInfo:
+    tol_id: str
+    species: str
+    sex: str
+    submitter: str
+    affiliation: str
+    tags: str  # "[INVALID TAG]" is appended to tags that are not valid
+
+
+@dataclass
+class Taxonomy:
+    taxon_id: str
+    class_name: str = "NA"
+    order_name: str = "NA"
+    haploid_number: object = "NA"
+    haploid_source: str = "NA"
+    ploidy: object = "NA"
+    ploidy_source: str = "NA"
+
+
+@dataclass
+class GenomeProfile:
+    genome_haploid_length: str  # as written by GenomeScope, e.g. "1,234,567"
+    proposed_ploidy: str  # from Smudgeplot if available, else GenomeScope
+
+
+@dataclass
+class Assembly:
+    stage: str
+    haplotype: str
+    order: int  # position of the haplotype in its stage, its row in Merqury tables
+    properties: dict  # YAML entries of the haplotype
+    gfastats: Optional[GfastatsReport] = None
+    has_merqury: bool = False  # the YAML gives Merqury results for it
+    qv: str = ""
+    completeness: str = ""
+    busco: Optional[BuscoSummary] = None
+    blob: Optional[BlobSummary] = None  # binned from blobtoolkit_dataset
+
+    @property
+    def key(self):
+        return (self.stage, self.haplotype)
+
+
+@dataclass
+class CurationNotes:
+    obs_haploid_num: object = "NA"
+    obs_sex: object = "NA"
+    interventions_per_gb: object = "NA"
+    contamination_notes: object = "NA"
+    other_notes: object = "NA"
+
+
+@dataclass
+class ReportData:
+    sample: SampleInfo
+    taxonomy: Taxonomy
+    genome_profile: GenomeProfile
+    notes: CurationNotes
+    sequencing_data: List[Tuple[str, object]]  # (technology, coverage)
+    pipelines: Dict[str, list]  # stage -> pipeline entries
+    stages: List[str]  # assembly stages in YAML order
+    haplotypes: List[str]  # haplotype names across all stages, first seen first
+    assemblies: Dict[Tuple[str, str], Assembly]  # (stage, haplotype) -> Assembly
+    # k-mer spectra tables of the curated assembly, plots (or None) per table, per-assembly
+    # plots named by haplotype; None where a haplotype adds no table of its own (see
+    # ear/resolvers.py)
+    spectra: List[Optional[List[Optional[SpectraPlot]]]] = field(default_factory=list)
+
+    # assemblies of a stage, in YAML order
+    def stage_assemblies(self, stage):
+        return [asm for asm in self.assemblies.values() if asm.stage == stage]
+
+    # (stage, haplotype) columns of the quality metrics table
+    def table_columns(self):
+        return [
+            (stage, haplotype)
+            for stage in self.stages
+            for haplotype in self.haplotypes
+            if (stage, haplotype) in self.assemblies
+        ]
+
+
+@dataclass
+class ReportMetrics:
+    gaps_per_gbp: Dict[Tuple[str, str], object]  # float, or "" if it can't be computed
+    max_total_bp: str  # largest curated total length, formatted, or "NA"
+    ebp_metrics: Dict[str, str]  # curated haplotype -> e.g. "7.8.Q52"
+    busco_lineage: Optional[
+        dict
+    ]  # shared BUSCO version and lineage, None if they differ
+
+
+@dataclass
+class Report:
+    data: ReportData
+    metrics: ReportMetrics
+    trait_warnings: List[str] = field(default_factory=list)  # expected vs observed
+    quality_warnings: List[str] = field(default_factory=list)  # below EBP standards
+    created: Optional[datetime] = None
+
+    @property
+    def warnings(self):
+        return self.trait_warnings + self.quality_warnings
@@ -0,0 +1,127 @@
+# ear/pdf_size.py
+# ERGA Sequencing and Assembly Committee
+# Size budget for the EAR PDF: parse --max-size values, and break a written PDF down into
+# the bytes of the images of each section and the rest (text, fonts, layout)
+
+import os
+import re
+
+SIZE_UNITS = {"": 1024**2, "K": 1024, "M": 1024**2, "G": 1024**3}
+SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?)i?B?\s*$", re.IGNORECASE)
+
+# image encodings tried in turn until the PDF fits: (dpi, JPEG quality), None keeps the
+# dpi asked for
+BUDGET_STEPS = [
+    (None, 85),
+    (None, 70),
+    (None, 55),
+    (None, 40),
+    (150, 40),
+    (100, 40),
+    (72, 30),
+]
+
+OBJECT_RE = re.compile(rb"(\d+) 0 obj\s*")
+LENGTH_RE = re.compile(rb"/Length (\d+)(?! \d+ R)")
+KIDS_RE = re.compile(rb"/Kids\s*\[(.*?)\]", re.S)
+XOBJECT_RE = re.compile(rb"/XObject\s*<<(.*?)>>", re.S)
+SMASK_RE = re.compile(rb"/SMask (\d+) 0 R")
+REF_RE = re.compile(rb"(\d+) 0 R")
+
+
+# "25M", "800KB", "1.5G" or a plain number of MB, in bytes
+def parse_size(value):
+    match = SIZE_RE.match(value)
+    if not match:
+        raise ValueError(f"Invalid size: {value}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def format_size(size):
+    if size < 1024**2:
+        return f"{size / 1024:.0f} KB"
+    return f"{size / 1024**2:.1f} MB"
+
+
+# number -> (dictionary bytes, stream length or None) of the objects of a PDF file as
+# reportlab writes it (no object streams, stream lengths given directly)
+def read_objects(data):
+    objects = {}
+    pos = 0
+    while True:
+        match = OBJECT_RE.search(data, pos)
+        if not match:
+            return objects
+        stream = data.find(b"stream", match.end())
+        endobj = data.find(b"endobj", match.end())
+        if endobj == -1:
+            return objects
+        if stream != -1 and stream < endobj:
+            dictionary = data[match.end() : stream]
+            length = LENGTH_RE.search(dictionary)
+            if length:
+                length = int(length.group(1))
+                # skip the stream data, which may contain anything
+                pos = stream + len("stream") + length
+            else:
+                pos = data.find(b"endstream", stream)
+                length = pos - stream
+        else:
+            dictionary = data[match.end() : endobj]
+            length = None
+            pos = endobj
+        objects[int(match.group(1))] = (dictionary, length)
+
+
+# bytes of the image XObjects (with their soft masks) first drawn on each page, in order
+def image_sizes_by_page(pdf_filename):
+    with open(pdf_filename, "rb") as file:
+        objects = read_objects(file.read())
+
+    def image_size(number):
+        dictionary, length = objects.get(number, (b"", None))
+        if b"/Subtype /Image" not in dictionary or length is None:
+            return 0
+        smask = SMASK_RE.search(dictionary)
+        return length + (image_size(int(smask.group(1))) if smask else 0)
+
+    kids = next(
+        (
+            KIDS_RE.search(dictionary)
+            for dictionary, _ in objects.values()
+            if b"/Type /Pages" in dictionary and b"/Kids" in dictionary
+        ),
+        None,
+    )
+    if kids is None:
+        return []
+
+    sizes = []
+    seen = set()
+    for page in REF_RE.findall(kids.group(1)):
+        xobjects = XOBJECT_RE.search(objects.get(int(page), (b"", None))[0])
+        size = 0
+        for number in REF_RE.findall(xobjects.group(1)) if xobjects else []:
+            if number not in seen:
+                seen.add(number)
+                size += image_size(int(number))
+        sizes.append(size)
+    return sizes
+
+
+# section -> image bytes, plus "text and layout" for the rest of the file, given the page
+# each section starts on (section -> page number, from 1)
+def size_breakdown(pdf_filename, section_pages):
+    breakdown = {}
+    starts = sorted(section_pages.items(), key=lambda item: item[1])
+    for page_number, size in enumerate(image_sizes_by_page(pdf_filename), 1):
+        if not size:
+            continue
+        section = next(
+            (name for name, start in reversed(starts) if start <= page_number), "other"
+        )
+        breakdown[section] = breakdown.get(section, 0) + size
+    breakdown["text and layout"] = os.path.getsize(pdf_filename) - sum(
+        breakdown.values()
+    )
+    return breakdown
@@ -0,0 +1,204 @@
+# ear/profiling.py
+# ERGA Sequencing and Assembly Committee
+# Wall time and peak resident memory of the named stages of an EAR run (--profile)
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_FILENAME = "EAR_trace.json"
+
+# the profiler stage() reports to, None when profiling is off
+_active = None
+
+
+# peak resident set size of the process in bytes, 0 where it can't be read (Windows)
+def peak_rss():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # ru_maxrss is in bytes on macOS and in kB elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# start the peak again from the current resident size (Linux only, a no-op elsewhere)
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+class Profiler:
+    def __init__(self):
+        # (name, parent path, thread id, start s, duration s, peak bytes)
+        self.events = []
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._open = 0  # stages open in all threads
+
+    # names of the stages open in the calling thread
+    @property
+    def _frames(self):
+        if not hasattr(self._local, "frames"):
+            self._local.frames = []
+        return self._local.frames
+
+    # names of the stages a new stage in the calling thread is nested in, starting with
+    # those open in the thread that handed it its work (see nested())
+    def path(self):
+        return getattr(self._local, "base_path", ()) + tuple(self._frames)
+
+    def __enter__(self):
+        global _active
+        self._origin = time.perf_counter()
+        _active = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active
+        _active = None
+        return False
+
+    # the peak memory of a stage is that of the process since its top-level stage
+    # started: the peak is only reset while no stage is open in any thread, as resetting
+    # it is process-wide and would lose the peak of stages running in other threads
+    @contextmanager
+    def stage(self, name):
+        path = self.path()
+        with self._lock:
+            # where the peak can't be reset it includes the stages before this one
+            if not self._open:
+                reset_peak_rss()
+            self._open += 1
+        self._frames.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._frames.pop()
+            with self._lock:
+                self._open -= 1
+            self.events.append(
+                (
+                    name,
+                    path,
+                    threading.get_ident(),
+                    start - self._origin,
+                    seconds,
+                    peak_rss(),
+                )
+            )
+
+    # one row per stage name and parent path, (name, depth, calls, seconds, peak), each
+    # under the stage it ran in, in the order the stages started
+    def summary(self):
+        rows = {}  # path of the stage, its own name last -> [calls, seconds, peak]
+        for name, path, _, start, seconds, peak in sorted(
+            self.events, key=lambda event: event[3]
+        ):
+            row = rows.setdefault(path + (name,), [0, 0.0, 0])
+            row[0] += 1
+            row[1] += seconds
+            row[2] = max(row[2], peak)
+
+        ordered = []
+
+        def add_children(parent):
+            for key, row in rows.items():
+                if key[:-1] == parent:
+                    ordered.append((key[-1], len(parent), *row))
+                    add_children(key)
+
+        # top-level stages, and those whose parent was still open when this was called
+        roots = dict.fromkeys(key[:-1] for key in rows if key[:-1] not in rows)
+        for root in roots:
+            add_children(root)
+        return ordered
+
+    def format_summary(self):
+        rows = self.summary()
+        names = ["  " * depth + name for name, depth, _, _, _ in rows]
+        name_width = max([len("Stage")] + [len(name) for name in names])
+        lines = [
+            f"{'Stage':<{name_width}}  {'Calls':>5}  {'Time (s)':>8}  {'Peak RSS MB':>11}"
+        ]
+        for name, (_, _, calls, seconds, peak) in zip(names, rows):
+            lines.append(
+                f"{name:<{name_width}}  {calls:>5}  {seconds:>8.3f}  {peak / 2**20:>11.1f}"
+            )
+        return "\n".join(lines)
+
+    # Chrome trace-event JSON, open it in chrome://tracing or https://ui.perfetto.dev
+    def write_trace(self, path):
+        trace_events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": round(start * 1e6),
+                "dur": round(seconds * 1e6),
+                "pid": os.getpid(),
+                "tid": thread_id,
+                "args": {"peak_rss_mb": round(peak / 2**20, 2)},
+            }
+            for name, _, thread_id, start, seconds, peak in self.events
+        ]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"traceEvents": trace_events}, file)
+        os.replace(tmp_path, path)
+
+
+# time a stage if a Profiler is active, do nothing otherwise
+@contextmanager
+def stage(name):
+    if _active is None:
+        yield
+    else:
+        with _active.stage(name):
+            yield
+
+
+# fn wrapped for a thread pool: its stages are nested under the stages open where it was
+# wrapped, instead of starting at the top level of the worker thread
+def nested(fn):
+    profiler = _active
+    if profiler is None:
+        return fn
+    base_path = profiler.path()
+
+    def run(*args, **kwargs):
+        local = profiler._local
+        previous = getattr(local, "base_path", ())
+        local.base_path = base_path
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            local.base_path = previous
+
+    return run
+
+
+# log the summary table to EAR.log and, if asked, write EAR_trace.json next to it
+def save_profile(profiler, output_dir, trace=False):
+    summary = profiler.format_summary()
+    logging.info(f"Profile of the EAR stages:\n{summary}")
+    if trace:
+        profiler.write_trace(os.path.join(output_dir, TRACE_FILENAME))
+    return summary
@@ -0,0 +1,832 @@
+# ear/render.py
+# ERGA Sequencing and Assembly Committee
+# Lay out a built Report (see ear/report.py) as the EAR PDF with reportlab
+
+import logging
+import os
+
+from reportlab import rl_config
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import (
+    Flowable,
+    Image,
+    PageBreak,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle,
+)
+
+from .blobplot import blob_drawing
+from .images import DEFAULT_DPI, ImagePreprocessor
+from .pdf_size import BUDGET_STEPS, format_size, size_breakdown
+from .profiling import stage
+from .report import BUSCO_METRICS
+from .spectra import spectra_drawing
+
+# embed streams as binary Flate data: ASCII85 text encoding is only needed for 7-bit
+# channels, and encoding every image with it (in pure Python without reportlab's C
+# accelerator) took most of the PDF build
+rl_config.useA85 = 0
+
+# gfastats labels (see ear/gfastats.py) and their names in the quality metrics table
+METRICS_TABLE_ROWS = [
+    ("Total scaffold length", "Total bp"),
+    ("GC content %", "GC %"),
+    ("# gaps in scaffolds", "Gaps/Gbp"),
+    ("Total gap length in scaffolds", "Total gap bp"),
+    ("# scaffolds", "Scaffolds"),
+    ("Scaffold N50", "Scaffold N50"),
+    ("Scaffold L50", "Scaffold L50"),
+    ("Scaffold L90", "Scaffold L90"),
+    ("# contigs", "Contigs"),
+    ("Contig N50", "Contig N50"),
+    ("Contig L50", "Contig L50"),
+    ("Contig L90", "Contig L90"),
+]
+
+# font of the quality metrics table
+METRICS_TABLE_FONT = ("Courier", 11)
+# reportlab's default left + right cell padding
+CELL_PADDING = 12
+
+# image sizes in the PDF
+HIC_SIZE = (11 * cm, 11 * cm)
+SPECTRA_SIZE = (8.4 * cm, 7 * cm)
+BLOB_SIZE = (20 * cm, 20 * cm)
+# k-mer spectra per page (two rows of two)
+SPECTRA_PER_PAGE = 4
+# HiC maps per page, each above its link
+HIC_PER_PAGE = 2
+
+
+def format_number(value):
+    if value is None:
+        return ""
+    try:
+        value_float = float(value)
+        if value_float.is_integer():
+            # format as an integer if no decimal part
+            return f"{int(value_float):,}"
+        else:
+            # format as a float
+            return f"{value_float:,}"
+    except ValueError:
+        # return the original value if it can't be converted to a float
+        return value
+
+
+# Parse pipeline and generate "tree"
+def generate_pipeline_tree(pipeline_data):
+    tree_lines = []
+    indent = "&nbsp;" * 2  # Adjust indent spacing as needed
+
+    for tool_version_param in pipeline_data:
+        parts = tool_version_param.split("|")
+        tool_version = parts[0]
+        tool, version = (
+            tool_version.split("_v") if "_v" in tool_version else (tool_version, "NA")
+        )
+
+        # Handle parameters: join all but the first (which is tool_version) with ', '
+        param_text = ", ".join(parts[1:]) if len(parts) > 1 else "NA"
+
+        # Tool line
+        tool_line = f"- <b>{tool}</b>"
+        tree_lines.append(tool_line)
+
+        # Version line
+        version_line = f"{indent*2}|_ <i>ver:</i> {version}"
+        tree_lines.append(version_line)
+
+        # Param line(s)
+        if param_text != "NA":
+            for param in param_text.split(","):
+                param = param.strip()
+                param_line = (
+                    f"{indent*2}|_ <i>key param:</i> {param if param else 'NA'}"
+                )
+                tree_lines.append(param_line)
+        else:
+            param_line = f"{indent*2}|_ <i>key param:</i> NA"
+            tree_lines.append(param_line)
+
+    # Join lines with HTML break for paragraph
+    tree_diagram = "<br/>".join(tree_lines)
+    return tree_diagram
+
+
+def get_styles():
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name="TitleStyle", fontName="Courier", fontSize=20))
+    styles.add(ParagraphStyle(name="subTitleStyle", fontName="Courier", fontSize=16))
+    styles.add(ParagraphStyle(name="normalStyle", fontName="Courier", fontSize=12))
+    styles.add(ParagraphStyle(name="midiStyle", fontName="Courier", fontSize=10))
+    styles.add(
+        ParagraphStyle(
+            name="LinkStyle",
+            fontName="Courier",
+            fontSize=10,
+            textColor="blue",
+            underline=True,
+        )
+    )
+    styles.add(
+        ParagraphStyle(name="treeStyle", fontName="Courier", fontSize=10, leftIndent=12)
+    )
+    styles.add(ParagraphStyle(name="miniStyle", fontName="Courier", fontSize=8))
+    styles.add(ParagraphStyle(name="FileNameStyle", fontName="Courier", fontSize=6))
+    return styles
+
+
+# rows of the quality metrics table, one column per (stage, haplotype)
+def metrics_table_data(report):
+    data = report.data
+    columns = data.table_columns()
+    assemblies = [data.assemblies[column] for column in columns]
+
+    table_data = [["Metrics"] + [f"{stage} \n {hap}" for stage, hap in columns]]
+    for label, name in METRICS_TABLE_ROWS:
+        if name == "Gaps/Gbp":
+            values = [report.metrics.gaps_per_gbp.get(column, "") for column in columns]
+        else:
+            values = [
+                asm.gfastats.get(label) if asm.gfastats else "" for asm in assemblies
+            ]
+        table_data.append([name] + [format_number(value) for value in values])
+
+    table_data.append(["QV"] + [asm.qv for asm in assemblies])
+    table_data.append(["Kmer compl."] + [asm.completeness for asm in assemblies])
+    for i, metric in enumerate(BUSCO_METRICS):
+        table_data.append(
+            [metric]
+            + [
+                f"{asm.busco.scores[i]}%" if asm.busco and asm.busco.scores else ""
+                for asm in assemblies
+            ]
+        )
+    return table_data
+
+
+# split a table into tables no wider than width, each with the first (label) column and as
+# many of the next columns as fit, measured from their longest cell text
+def split_table_columns(table_data, width, font_name, font_size):
+    column_widths = [
+        max(
+            stringWidth(line.strip(), font_name, font_size)
+            for cell in column
+            for line in str(cell).split("\n")
+        )
+        + CELL_PADDING
+        for column in zip(*table_data)
+    ]
+
+    chunks = []
+    start = 1
+    while start < len(column_widths):
+        end = start + 1
+        used = column_widths[0] + column_widths[start]
+        while end < len(column_widths) and used + column_widths[end] <= width:
+            used += column_widths[end]
+            end += 1
+        chunks.append([[row[0]] + row[start:end] for row in table_data])
+        start = end
+    return chunks or [table_data]
+
+
+# the PretextSnapshot PNG of a curated assembly, else its Hi-C cooler file, drawn here
+def hic_map_file(properties):
+    return properties.get("hic_FullMap_png") or properties.get("hic_FullMap_mcool", "")
+
+
+# (path, width, height) of every image drawn in the PDF, for the image preprocessor
+def image_placements(curated, spectra):
+    placements = []
+    for assembly in curated:
+        properties = assembly.properties
+        hic_map = hic_map_file(properties)
+        if hic_map:
+            placements.append((hic_map, *HIC_SIZE))
+        if assembly.blob is None and properties.get("blobplot_cont_png"):
+            placements.append((properties["blobplot_cont_png"], *BLOB_SIZE))
+    for plots in spectra:
+        placements += [
+            (plot.path, *SPECTRA_SIZE)
+            for plot in plots or []
+            if plot and plot.scale != "hist"
+        ]
+    return placements
+
+
+def summary_section(report, styles, ear_version):
+    data = report.data
+    metrics = report.metrics
+    sample = data.sample
+    taxonomy = data.taxonomy
+    notes = data.notes
+    elements = []
+
+    # Add the title
+    elements.append(Paragraph("ERGA Assembly Report", styles["TitleStyle"]))
+    elements.append(Spacer(1, 12))
+
+    # Add version
+    elements.append(Paragraph(ear_version, styles["normalStyle"]))
+    elements.append(Spacer(1, 12))
+
+    # Add tags
+    elements.append(Paragraph(f"Tags: {sample.tags}", styles["normalStyle"]))
+    elements.append(Spacer(1, 24))
+
+    # Create the SPECIES DATA table with the transposed data
+    sp_data = [
+        ["TxID", "ToLID", "Species", "Class", "Order"],
+        [
+            taxonomy.taxon_id,
+            sample.tol_id,
+            sample.species,
+            taxonomy.class_name,
+            taxonomy.order_name,
+        ],
+    ]
+    sp_data_table = Table(list(map(list, zip(*sp_data))))
+    sp_data_table.setStyle(
+        TableStyle(
+            [
+                (
+                    "BACKGROUND",
+                    (0, 0),
+                    (0, -1),
+                    "#e7e7e7",
+                ),  # Grey background for column 1
+                (
+                    "BACKGROUND",
+                    (1, 0),
+                    (1, -1),
+                    colors.white,
+                ),  # White background for column 2
+                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+                ("FONTNAME", (0, 0), (0, 0), "Courier"),  # Regular font for row1, col1
+                ("FONTNAME", (1, 0), (1, 0), "Courier"),
+                (
+                    "FONTNAME",
+                    (0, 1),
+                    (-1, -1),
+                    "Courier",
+                ),  # Regular font for the rest of the table
+                (
+                    "FONTNAME",
+                    (1, 1),
+                    (1, 1),
+                    "Courier-Bold",
+                ),  # Bold font for row1, col2
+                ("FONTSIZE", (0, 0), (-1, -1), 14),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+            ]
+        )
+    )
+    elements.append(sp_data_table)
+    elements.append(Spacer(1, 32))
+
+    # Create the GENOME TRAITS table
+    genome_traits_table = Table(
+        [
+            ["Genome Traits", "Expected", "Observed"],
+            [
+                "Haploid size (bp)",
+                data.genome_profile.genome_haploid_length,
+                f"{metrics.max_total_bp}",
+            ],
+            [
+                "Haploid Number",
+                f"{taxonomy.haploid_number} (source: {taxonomy.haploid_source})",
+                notes.obs_haploid_num,
+            ],
+            [
+                "Ploidy",
+                f"{taxonomy.ploidy} (source: {taxonomy.ploidy_source})",
+                data.genome_profile.proposed_ploidy,
+            ],
+            ["Sample Sex", sample.sex, notes.obs_sex],
+        ]
+    )
+    genome_traits_table.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (0, -1), "#e7e7e7"),
+                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+                ("FONTNAME", (0, 0), (-1, -1), "Courier"),
+                ("FONTSIZE", (0, 0), (-1, -1), 12),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+            ]
+        )
+    )
+    elements.append(genome_traits_table)
+    elements.append(Spacer(1, 28))
+
+    # Add EBP METRICS SECTION subtitle
+    elements.append(
+        Paragraph("EBP metrics summary and curation notes", styles["subTitleStyle"])
+    )
+    elements.append(Spacer(1, 24))
+
+    for haplotype, ebp_metric in metrics.ebp_metrics.items():
+        elements.append(
+            Paragraph(
+                f"Obtained EBP quality metric for {haplotype}: {ebp_metric}",
+                styles["midiStyle"],
+            )
+        )
+    elements.append(Spacer(1, 8))
+
+    elements.append(
+        Paragraph(
+            "The following metrics were automatically flagged as below EBP recommended standards or different from expected:",
+            styles["midiStyle"],
+        )
+    )
+    elements.append(Spacer(1, 4))
+
+    # Add the warning paragraphs
+    for message in report.trait_warnings:
+        elements.append(Paragraph(f". {message}", styles["midiStyle"]))
+    elements.append(Spacer(1, 4))
+    for message in report.quality_warnings:
+        elements.append(Paragraph(f". {message}", styles["midiStyle"]))
+    elements.append(Spacer(1, 24))
+
+    # Curator notes
+    elements.append(Paragraph("Curator notes", styles["normalStyle"]))
+    elements.append(Spacer(1, 8))
+    curator_notes_text = (
+        f". Interventions/Gb: {notes.interventions_per_gb}<br/>"
+        f". Contamination notes: &quot;{notes.contamination_notes}&quot;<br/>"
+        f". Other observations: &quot;{notes.other_notes}&quot;"
+    )
+    elements.append(Paragraph(curator_notes_text, styles["midiStyle"]))
+    elements.append(PageBreak())
+
+    return elements
+
+
+# quality metrics table and BUSCO lineage
+def metrics_table_section(report, styles, width):
+    metrics = report.metrics
+    elements = []
+
+    # Add quality metrics section subtitle
+    elements.append(Paragraph("Quality metrics table", styles["TitleStyle"]))
+    elements.append(Spacer(1, 48))
+
+    # create QUALITY METRICS table, split into several tables (flowing onto the next
+    # pages) when there are more stages and haplotypes than fit across the page
+    font_name, font_size = METRICS_TABLE_FONT
+    table_chunks = split_table_columns(
+        metrics_table_data(report), width, font_name, font_size
+    )
+    for i, table_data in enumerate(table_chunks):
+        if i > 0:
+            elements.append(Spacer(1, 24))
+        asm_table = Table(table_data, repeatRows=1)
+        asm_table.setStyle(
+            TableStyle(
+                [
+                    (
+                        "BACKGROUND",
+                        (0, 0),
+                        (-1, 0),
+                        "#e7e7e7",
+                    ),  # grey background for the header
+                    ("ALIGN", (0, 0), (-1, -1), "CENTER"),  # center alignment
+                    (
+                        "FONTNAME",
+                        (0, 0),
+                        (-1, -1),
+                        font_name,
+                    ),  # bold font for the header
+                    ("FONTSIZE", (0, 0), (-1, -1), font_size),  # font size
+                    ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+                    ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+                ]
+            )
+        )
+        elements.append(asm_table)
+    elements.append(Spacer(1, 5))
+
+    # BUSCO version and lineage, if they are the same across results
+    busco_lineage = metrics.busco_lineage
+    if busco_lineage:
+        elements.append(
+            Paragraph(
+                f"BUSCO {busco_lineage['version']} Lineage: {busco_lineage['lineage']} (genomes:{busco_lineage['genomes']}, BUSCOs:{busco_lineage['buscos']})",
+                styles["miniStyle"],
+            )
+        )
+    else:
+        elements.append(
+            Paragraph(
+                "Warning: BUSCO versions or lineage datasets are not the same across results",
+                styles["miniStyle"],
+            )
+        )
+    elements.append(PageBreak())
+
+    return elements
+
+
+# HiC contact maps of the curated haplotypes
+def hic_section(report, styles, image_preprocessor):
+    curated = report.data.stage_assemblies("Curated")
+    elements = []
+
+    # Add hic maps section subtitle
+    elements.append(
+        Paragraph("HiC contact map of curated assembly", styles["TitleStyle"])
+    )
+    elements.append(Spacer(1, 36))
+
+    maps_with_links = []  # (map or message, link) of each haplotype
+    for assembly in curated:
+        haplotype = assembly.haplotype
+
+        # Check if there is an image and/or a link
+        hic_map = hic_map_file(assembly.properties)
+        link = assembly.properties.get("hic_FullMap_link", "")
+
+        source = image_preprocessor.source(hic_map, *HIC_SIZE) if hic_map else None
+        if source is not None:
+            figure = Image(source, width=HIC_SIZE[0], height=HIC_SIZE[1])
+        else:
+            message = (
+                "HiC map could not be drawn!" if hic_map else "HiC PNG is missing!"
+            )
+            figure = Paragraph(f"<b>{haplotype}</b> {message}", styles["midiStyle"])
+
+        if link:
+            link_html = (
+                f'<b>{haplotype}</b> <link href="{link}" color="blue">[LINK]</link>'
+            )
+        else:
+            link_html = f"<b>{haplotype}</b> File link is missing!"
+        maps_with_links.append((figure, Paragraph(link_html, styles["midiStyle"])))
+
+    # one table per page of HIC_PER_PAGE haplotypes, so a map never leaves its link
+    for start in range(0, len(maps_with_links), HIC_PER_PAGE):
+        if start:
+            elements.append(PageBreak())
+        rows = []
+        for figure, link in maps_with_links[start : start + HIC_PER_PAGE]:
+            if rows:
+                rows.append([Spacer(1, 12)])
+            rows += [[figure], [link]]
+        table = Table(rows)
+        table.hAlign = "CENTER"
+        elements.append(table)
+
+    elements.append(PageBreak())
+
+    return elements
+
+
+# Merqury k-mer spectra of the curated haplotypes
+def kmer_spectra_section(report, styles, image_preprocessor):
+    elements = []
+
+    # Add kmer spectra section subtitle
+    elements.append(
+        Paragraph("K-mer spectra of curated assembly", styles["TitleStyle"])
+    )
+    elements.append(Spacer(1, 48))
+
+    counter = 0
+    for plots in report.data.spectra:
+        if plots is not None:
+            # one table per page: many haplotypes give more spectra than fit on one
+            captions = spectra_captions(plots)
+            for start in range(0, len(plots), SPECTRA_PER_PAGE):
+                page_plots = plots[start : start + SPECTRA_PER_PAGE]
+                elements.append(
+                    spectra_table(page_plots, captions, styles, image_preprocessor)
+                )
+
+                # Increase counter by the number of PNGs added
+                counter += len(page_plots)
+
+                # If counter is a multiple of 4, insert a page break and reset counter
+                if counter % SPECTRA_PER_PAGE == 0:
+                    elements.append(PageBreak())
+                    counter = 0
+
+        elements.append(Spacer(1, 12))
+
+    # If the last page does not contain exactly 4 images, insert a page break
+    if counter % SPECTRA_PER_PAGE != 0:
+        elements.append(PageBreak())
+
+    return elements
+
+
+# BlobToolKit plots of the curated haplotypes
+def contamination_section(report, styles, image_preprocessor):
+    curated = report.data.stage_assemblies("Curated")
+    elements = []
+
+    # Add contamination section subtitle
+    elements.append(
+        Paragraph("Post-curation contamination screening", styles["TitleStyle"])
+    )
+    elements.append(Spacer(1, 36))
+
+    for assembly in curated:
+        haplotype = assembly.haplotype
+        if assembly.blob is None and "blobplot_cont_png" not in assembly.properties:
+            continue
+        png_file = assembly.properties.get("blobplot_cont_png")
+        if assembly.blob is not None or png_file:
+            # drawn from the BlobToolKit dataset when there is one, else the PNG
+            if assembly.blob is not None:
+                elements.append(blob_drawing(assembly.blob, *BLOB_SIZE))
+            else:
+                elements.append(
+                    Image(
+                        image_preprocessor.source(png_file, *BLOB_SIZE),
+                        width=BLOB_SIZE[0],
+                        height=BLOB_SIZE[1],
+                    )
+                )
+            blob_text = f"<b>{haplotype}.</b> Bubble plot circles are scaled by sequence length, positioned by coverage and GC proportion, and coloured by taxonomy. Histograms show total assembly length distribution on each axis."
+            elements.append(Paragraph(blob_text, styles["midiStyle"]))
+        else:
+            elements.append(
+                Paragraph(f"<b>{haplotype}</b> PNG is missing!", styles["midiStyle"])
+            )
+
+        # Add a page break after each image and its description
+        elements.append(PageBreak())
+
+    return elements
+
+
+# sequencing data, pipelines, submitter and date
+def data_profile_section(report, styles):
+    data = report.data
+    sample = data.sample
+    elements = []
+
+    # Add data profile section subtitle
+    elements.append(Paragraph("Data profile", styles["TitleStyle"]))
+    elements.append(Spacer(1, 24))
+
+    # Create the DATA PROFILE table
+    data_table = Table(
+        [
+            ["Data"] + [technology for technology, _ in data.sequencing_data],
+            ["Coverage"] + [coverage for _, coverage in data.sequencing_data],
+        ]
+    )
+    data_table.setStyle(
+        TableStyle(
+            [
+                (
+                    "BACKGROUND",
+                    (0, 0),
+                    (0, -1),
+                    "#e7e7e7",
+                ),  # grey background for the first column
+                ("ALIGN", (0, 0), (-1, -1), "CENTER"),  # center alignment
+                ("FONTNAME", (0, 0), (-1, -1), "Courier"),  # remove bold font
+                ("FONTSIZE", (0, 0), (-1, -1), 12),  # font size for the header
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+            ]
+        )
+    )
+    elements.append(data_table)
+    elements.append(Spacer(1, 32))
+
+    # Add assembly and curation pipelines
+    for title, stage in [
+        ("Assembly pipeline", "Pre-curation"),
+        ("Curation pipeline", "Curated"),
+    ]:
+        elements.append(Paragraph(title, styles["TitleStyle"]))
+        elements.append(Spacer(1, 24))
+        pipeline_tree = generate_pipeline_tree(data.pipelines.get(stage, []))
+        elements.append(Paragraph(pipeline_tree, styles["treeStyle"]))
+        elements.append(Spacer(1, 32 if stage == "Pre-curation" else 48))
+
+    # Add submitter, affiliation
+    submitter_paragraph_style = ParagraphStyle(
+        name="SubmitterStyle", fontName="Courier", fontSize=10
+    )
+    elements.append(
+        Paragraph(f"Submitter: {sample.submitter}", submitter_paragraph_style)
+    )
+    elements.append(
+        Paragraph(f"Affiliation: {sample.affiliation}", submitter_paragraph_style)
+    )
+    elements.append(Spacer(1, 8))
+
+    # Add the date and time (CET) of the document creation
+    formatted_datetime = report.created.strftime("%Y-%m-%d %H:%M:%S %Z")
+    elements.append(
+        Paragraph(f"Date and time: {formatted_datetime}", submitter_paragraph_style)
+    )
+
+    return elements
+
+
+# zero-size flowable noting the page a section starts on, for the PDF size breakdown
+class SectionStart(Flowable):
+    def __init__(self, name, section_pages):
+        super().__init__()
+        self.name = name
+        self.section_pages = section_pages
+
+    def wrap(self, available_width, available_height):
+        return 0, 0
+
+    def draw(self):
+        self.section_pages.setdefault(self.name, self.canv.getPageNumber())
+
+
+# build the PDF, return the page each section starts on (section -> page number)
+def render_pdf(
+    report, pdf_filename, ear_version, image_preprocessor=None, page_compression=None
+):
+    if image_preprocessor is None:
+        image_preprocessor = ImagePreprocessor()
+    # Downsample the images to the size they are drawn at, all at once in threads
+    # (already done while parsing, by make_report)
+    with stage("pdf images"):
+        image_preprocessor.prepare_all(
+            image_placements(
+                report.data.stage_assemblies("Curated"), report.data.spectra
+            )
+        )
+
+    # Set up the PDF file
+    margin = 0.5 * 72  # 0.5 inch in points (normal margin is 1 inch)
+    pdf = SimpleDocTemplate(
+        pdf_filename,
+        pagesize=A4,
+        leftMargin=margin,
+        rightMargin=margin,
+        topMargin=margin,
+        bottomMargin=margin,
+        pageCompression=page_compression,
+    )
+    styles = get_styles()
+
+    elements = []
+    section_pages = {}
+    with stage("pdf summary"):
+        elements.append(SectionStart("summary", section_pages))
+        elements += summary_section(report, styles, ear_version)
+    with stage("pdf metrics table"):
+        elements.append(SectionStart("metrics table", section_pages))
+        elements += metrics_table_section(report, styles, pdf.width)
+    with stage("pdf hic"):
+        elements.append(SectionStart("HiC maps", section_pages))
+        elements += hic_section(report, styles, image_preprocessor)
+    with stage("pdf kmer spectra"):
+        elements.append(SectionStart("k-mer spectra", section_pages))
+        elements += kmer_spectra_section(report, styles, image_preprocessor)
+    with stage("pdf contamination"):
+        elements.append(SectionStart("blob plots", section_pages))
+        elements += contamination_section(report, styles, image_preprocessor)
+    with stage("pdf data profile"):
+        elements.append(SectionStart("data profile", section_pages))
+        elements += data_profile_section(report, styles)
+
+    with stage("pdf build"):
+        pdf.build(elements)
+    return section_pages
+
+
+# build the PDF with page compression, re-encoding the images with the next of
+# BUDGET_STEPS until the file is at most max_size bytes; logs the size of each section
+def render_pdf_within_size(
+    report, pdf_filename, ear_version, max_size, image_preprocessor=None
+):
+    if image_preprocessor is None:
+        image_preprocessor = ImagePreprocessor()
+    dpi = image_preprocessor.dpi or DEFAULT_DPI
+    preprocessors = [image_preprocessor] + [
+        ImagePreprocessor(
+            dpi=min(step_dpi or dpi, dpi),
+            jpeg_quality=quality,
+            workers=image_preprocessor.workers,
+            cache_dir=image_preprocessor.cache_dir,
+        )
+        for step_dpi, quality in BUDGET_STEPS
+        if image_preprocessor.jpeg_quality is None
+        or quality < image_preprocessor.jpeg_quality
+    ]
+
+    for preprocessor in preprocessors:
+        section_pages = render_pdf(
+            report, pdf_filename, ear_version, preprocessor, page_compression=1
+        )
+        size = os.path.getsize(pdf_filename)
+        if size <= max_size:
+            break
+
+    if not preprocessor.dpi:
+        encoding = "original images"
+    elif preprocessor.jpeg_quality is None:
+        encoding = f"images at {preprocessor.dpi} dpi as PNG"
+    else:
+        encoding = f"images at {preprocessor.dpi} dpi as JPEG quality {preprocessor.jpeg_quality}"
+    breakdown = ", ".join(
+        f"{section} {format_size(section_size)}"
+        for section, section_size in size_breakdown(pdf_filename, section_pages).items()
+    )
+    message = f"PDF size {format_size(size)} of {format_size(max_size)} with {encoding}: {breakdown}"
+    if size > max_size:
+        logging.warning(f"{message}. The PDF is over the size budget")
+    else:
+        logging.info(message)
+    return section_pages
+
+
+# captions of the k-mer spectra of one Merqury run (SpectraPlot -> text)
+def spectra_captions(plots):
+    plots = [plot for plot in plots if plot]
+    haplotype_plots = [plot for plot in plots if plot.plot == "cn" and plot.assembly]
+    has_whole_cn = any(plot.plot == "cn" and not plot.assembly for plot in plots)
+
+    captions = {}
+    for plot in plots:
+        if plot.plot == "asm":
+            text = "Distribution of k-mer counts coloured by their presence in reads/assemblies"
+        elif plot.assembly and has_whole_cn:
+            text = f"Distribution of k-mer counts per copy numbers found in <b>{plot.assembly}</b> (hapl.)"
+        elif not plot.assembly and len(haplotype_plots) == 2:
+            text = "Distribution of k-mer counts per copy numbers found in asm (dipl.)"
+        else:
+            # the assembly of a run on a single assembly, or of a run on more than two
+            text = "Distribution of k-mer counts per copy numbers found in asm"
+        captions[plot] = text
+    return captions
+
+
+# two-column table of k-mer spectra, with their captions
+def spectra_table(plots, captions, styles, image_preprocessor):
+    # Create image objects and add the caption below each image
+    images = []
+    for plot in plots:
+        if not plot:
+            continue
+        if plot.scale == "hist":
+            # vector plot drawn from the Merqury table
+            try:
+                image = spectra_drawing(plot.path, *SPECTRA_SIZE)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Error reading {plot.path}: {str(e)}")
+                continue
+        else:
+            image = Image(
+                image_preprocessor.source(plot.path, *SPECTRA_SIZE),
+                width=SPECTRA_SIZE[0],
+                height=SPECTRA_SIZE[1],
+            )
+        images.append([image, Paragraph(captions[plot], styles["midiStyle"])])
+
+    # get number of rows and columns for the table
+    num_columns = 2
+    num_rows = (len(images) + 1) // num_columns  # +1 to handle odd numbers of images
+    image_table = Table(
+        [
+            [
+                (
+                    images[i * num_columns + j]
+                    if i * num_columns + j < len(images)
+                    else []
+                )
+                for j in range(num_columns)
+            ]
+            for i in range(num_rows)
+        ]
+    )
+    image_table.setStyle(
+        TableStyle(
+            [
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                (
+                    "BOTTOMPADDING",
+                    (0, 0),
+                    (-1, -1),
+                    20,
+                ),  # 20 here is a spacer between rows
+            ]
+        )
+    )
+    return image_table
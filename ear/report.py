@@ -0,0 +1,694 @@
+# ear/report.py
+# ERGA Sequencing and Assembly Committee
+# Stages of an EAR: read the inputs, compute the metrics, evaluate the warnings
+# and render the PDF. Each stage can be called on its own; make_report runs them all.
+
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+
+from . import bundles
+from .agp import read_fai_agp_stats
+from .blobtoolkit import read_blobdir
+from .busco import BuscoSummary, read_busco_summary
+from .fasta_stats import read_fasta_stats
+from .genome_profile import read_genomescope_summary, read_smudgeplot_ploidy
+from .gfastats import GfastatsReport, read_gfastats_report
+from .goat import GoatClient
+from .metrics import build_metrics_document, write_metrics
+from .model import (
+    Assembly,
+    CurationNotes,
+    EARError,
+    GenomeProfile,
+    Report,
+    ReportData,
+    ReportMetrics,
+    SampleInfo,
+    Taxonomy,
+)
+from .profiling import nested, stage
+from .resolvers import FolderResolver
+
+REQUIRED_FIELDS = ["ToLID", "Species", "Sex", "Submitter", "Affiliation", "Tags"]
+VALID_TAGS = ["ERGA-BGE", "ERGA-Pilot", "ERGA-Satellite"]
+BUSCO_METRICS = ["BUSCO sing.", "BUSCO dupl.", "BUSCO frag.", "BUSCO miss."]
+
+# INPUTS ######################################################################################
+
+
+# parse an input file, through the build cache if there is one (see ear/build_cache.py)
+def parse_input(build_cache, kind, path, parse, to_json=None, from_json=None):
+    if build_cache is None:
+        return parse(path)
+    return build_cache.parsed(kind, path, parse, to_json, from_json)
+
+
+def load_yaml(yaml_file):
+    import yaml
+
+    try:
+        with bundles.open_input(yaml_file) as file:
+            yaml_data = yaml.safe_load(file)
+    except (OSError, yaml.YAMLError) as e:
+        raise EARError(f"Cannot read the yaml file {yaml_file}: {str(e)}")
+    if not isinstance(yaml_data, dict):
+        raise EARError(f"The yaml file {yaml_file} does not contain EAR sections")
+    return bundles.resolve_yaml_paths(yaml_file, yaml_data)
+
+
+def read_sample_info(yaml_data):
+    # Check for required fields
+    missing_fields = [
+        field
+        for field in REQUIRED_FIELDS
+        if field not in yaml_data or not yaml_data[field]
+    ]
+    if missing_fields:
+        raise EARError(
+            f"# GENERAL INFORMATION section in the yaml file is missing or empty for the following information: {', '.join(missing_fields)}"
+        )
+
+    # Check that "Species" field is a string
+    if not isinstance(yaml_data["Species"], str):
+        raise EARError(
+            f"# GENERAL INFORMATION section in the yaml file contains incorrect data type for 'Species'. Expected 'str' but got '{type(yaml_data['Species']).__name__}'."
+        )
+
+    # Check if tag is valid
+    tags = yaml_data["Tags"]
+    if tags not in VALID_TAGS:
+        tags += "[INVALID TAG]"
+        logging.warning(
+            f"# SAMPLE INFORMATION section in the yaml file contains an invalid tag. Valid tags are ERGA-BGE, ERGA-Pilot and ERGA-Satellite"
+        )
+
+    return SampleInfo(
+        tol_id=yaml_data["ToLID"],
+        species=yaml_data["Species"],
+        sex=yaml_data["Sex"],
+        submitter=yaml_data["Submitter"],
+        affiliation=yaml_data["Affiliation"],
+        tags=tags,
+    )
+
+
+# Get data from GoaT based on species name (cached on disk, see ear/goat.py)
+def fetch_taxonomy(species, goat_client=None):
+    if goat_client is None:
+        goat_client = GoatClient()
+    with stage("goat search"):
+        goat_data = goat_client.search(species)
+    if not goat_data.get("results"):
+        raise EARError(f"GoaT found no taxon for the species '{species}'")
+
+    taxonomy = Taxonomy(taxon_id=goat_data["results"][0]["result"]["taxon_id"])
+    for result in goat_data["results"]:
+        for node in result["result"]["lineage"]:
+            if node["taxon_rank"] == "class":
+                taxonomy.class_name = node["scientific_name"]
+            if node["taxon_rank"] == "order":
+                taxonomy.order_name = node["scientific_name"]
+
+    with stage("goat record"):
+        goat_record = goat_client.record(taxonomy.taxon_id)
+    if not goat_record.get("records"):
+        raise EARError(
+            f"GoaT has no record for '{species}' (taxon {taxonomy.taxon_id})"
+        )
+    attributes = goat_record["records"][0]["record"]["attributes"]
+    taxonomy.ploidy = attributes["ploidy"]["value"]
+    taxonomy.ploidy_source = attributes["ploidy"]["aggregation_source"]
+    taxonomy.haploid_number = attributes["haploid_number"]["value"]
+    taxonomy.haploid_source = attributes["haploid_number"]["aggregation_source"]
+    return taxonomy
+
+
+# Reading GENOME PROFILING DATA section from yaml
+def read_genome_profile(yaml_data, build_cache=None, resolver=None):
+    if resolver is None:
+        resolver = FolderResolver()
+    profiling_data = yaml_data.get("PROFILING")
+    if not profiling_data:
+        raise EARError("Error: No profiling data found in the YAML file.")
+
+    genome_haploid_length, proposed_ploidy = parse_input(
+        build_cache,
+        "genomescope",
+        resolver.genomescope_summary(profiling_data),
+        read_genomescope_summary,
+        from_json=tuple,
+    )
+
+    try:
+        smudgeplot_file = resolver.smudgeplot_summary(profiling_data)
+    except EARError as e:
+        logging.warning(f"{str(e)} Skipping Smudgeplot.")
+    else:
+        smudgeplot_ploidy = parse_input(
+            build_cache, "smudgeplot", smudgeplot_file, read_smudgeplot_ploidy
+        )
+        if smudgeplot_ploidy is not None:
+            proposed_ploidy = smudgeplot_ploidy
+        return GenomeProfile(genome_haploid_length, proposed_ploidy)
+
+    logging.warning(
+        "# Getting Proposed ploidy information from GenomeScope because SmudgePlot data is missing."
+    )
+    return GenomeProfile(genome_haploid_length, proposed_ploidy)
+
+
+# QV and k-mer completeness of the assembly at position order, "" if they can't be read
+def read_merqury_values(resolver, properties, order):
+    try:
+        results = resolver.merqury(properties)
+    except Exception as e:
+        logging.error(f"Error reading Merqury results: {str(e)}")
+        return "", ""
+    return results.qv(order), results.completeness(order)
+
+
+# the gfastats report, or without one the same statistics computed from assembly_fai and
+# assembly_agp, or else from assembly_fasta
+def read_assembly_gfastats(assembly, build_cache=None):
+    properties = assembly.properties
+    if "gfastats--nstar-report_txt" not in properties and "assembly_fai" in properties:
+        if not properties.get("assembly_agp"):
+            raise EARError(
+                f"{assembly.stage} {assembly.haplotype} assembly_fai needs assembly_agp"
+            )
+        # milliseconds to read, so not kept in the build cache
+        with stage("fai agp"):
+            try:
+                assembly.gfastats = read_fai_agp_stats(
+                    properties["assembly_fai"], properties["assembly_agp"]
+                )
+            except (OSError, ValueError) as e:
+                raise EARError(
+                    f"{assembly.stage} {assembly.haplotype} fai and agp: {str(e)}"
+                )
+        return
+    if "gfastats--nstar-report_txt" in properties:
+        kind, key, read = "gfastats", "gfastats--nstar-report_txt", read_gfastats_report
+    else:
+        kind, key, read = "fasta", "assembly_fasta", read_fasta_stats
+    with stage(kind):
+        try:
+            assembly.gfastats = parse_input(
+                build_cache,
+                kind,
+                properties[key],
+                read,
+                asdict,
+                lambda fields: GfastatsReport(**fields),
+            )
+        except (OSError, ValueError) as e:
+            raise EARError(f"{assembly.stage} {assembly.haplotype} {kind}: {str(e)}")
+
+
+def read_assembly_merqury(assembly, resolver):
+    with stage("merqury"):
+        assembly.qv, assembly.completeness = read_merqury_values(
+            resolver, assembly.properties, assembly.order
+        )
+
+
+def read_assembly_busco(assembly, build_cache=None):
+    busco_file = assembly.properties["busco_short_summary_txt"]
+    with stage("busco"):
+        try:
+            assembly.busco = parse_input(
+                build_cache,
+                "busco",
+                busco_file,
+                read_busco_summary,
+                asdict,
+                lambda fields: BuscoSummary(**fields),
+            )
+        except (OSError, ValueError) as e:
+            logging.warning(f"Error reading {busco_file}: {str(e)}")
+    if assembly.busco and assembly.busco.scores is None:
+        logging.warning(f"No BUSCO results line found in {busco_file}")
+
+
+# the blob plot of a curated assembly, binned from its BlobToolKit dataset
+def read_assembly_blobtoolkit(assembly):
+    blobdir = assembly.properties["blobtoolkit_dataset"]
+    # a folder, so not kept in the build cache
+    with stage("blobtoolkit"):
+        try:
+            assembly.blob = read_blobdir(blobdir)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Error reading BlobToolKit dataset {blobdir}: {str(e)}")
+
+
+# Reading ASSEMBLY DATA section from yaml: parse the inputs of every stage and haplotype,
+# concurrently in executor if one is given
+def read_assemblies(yaml_data, build_cache=None, resolver=None, executor=None):
+    if resolver is None:
+        resolver = FolderResolver()
+    asm_data = yaml_data.get("ASSEMBLIES", {})
+    if not isinstance(asm_data, dict):
+        raise EARError("# ASSEMBLIES section in the yaml file is not valid")
+
+    stages = []
+    haplotypes = []
+    assemblies = {}
+    tasks = []  # (reader, arguments) of every input file
+    for asm_stage, stage_properties in asm_data.items():
+        stages.append(asm_stage)
+        if not isinstance(stage_properties, dict):
+            continue
+        stage_haplotypes = [key for key in stage_properties if key != "pipeline"]
+        for order, haplotype in enumerate(stage_haplotypes):
+            if haplotype not in haplotypes:
+                haplotypes.append(haplotype)
+
+            properties = stage_properties[haplotype]
+            assembly = Assembly(
+                stage=asm_stage,
+                haplotype=haplotype,
+                order=order,
+                properties=properties if isinstance(properties, dict) else {},
+            )
+            assemblies[assembly.key] = assembly
+            properties = assembly.properties
+
+            if any(
+                key in properties
+                for key in [
+                    "gfastats--nstar-report_txt",
+                    "assembly_fai",
+                    "assembly_fasta",
+                ]
+            ):
+                tasks.append((read_assembly_gfastats, (assembly, build_cache)))
+            if resolver.has_merqury(properties):
+                assembly.has_merqury = True
+                tasks.append((read_assembly_merqury, (assembly, resolver)))
+            if "busco_short_summary_txt" in properties:
+                tasks.append((read_assembly_busco, (assembly, build_cache)))
+            if asm_stage == "Curated" and properties.get("blobtoolkit_dataset"):
+                tasks.append((read_assembly_blobtoolkit, (assembly,)))
+
+    # each reader sets its own fields of an assembly; errors are raised in YAML order
+    if executor is None:
+        for reader, arguments in tasks:
+            reader(*arguments)
+    else:
+        futures = [
+            executor.submit(nested(reader), *arguments) for reader, arguments in tasks
+        ]
+        for future in futures:
+            future.result()
+
+    pipelines = {
+        stage: (asm_data[stage] or {}).get("pipeline", [])
+        for stage in stages
+        if isinstance(asm_data[stage], dict)
+    }
+    return stages, haplotypes, assemblies, pipelines
+
+
+# Reading CURATION NOTES section from yaml
+def read_notes(yaml_data):
+    notes = yaml_data.get("NOTES", {})
+    return CurationNotes(
+        obs_haploid_num=notes.get("Obs_Haploid_num", "NA"),
+        obs_sex=notes.get("Obs_Sex", "NA"),
+        interventions_per_gb=notes.get("Interventions_per_Gb", "NA"),
+        contamination_notes=notes.get("Contamination_notes", "NA"),
+        other_notes=notes.get("Other_notes", "NA"),
+    )
+
+
+# Reading SEQUENCING DATA section from yaml
+def read_sequencing_data(yaml_data):
+    sequencing_data = []
+    for item in yaml_data.get("DATA", []):
+        for technology, coverage in item.items():
+            sequencing_data.append((technology, "NA" if not coverage else coverage))
+    return sequencing_data
+
+
+# stage 1: read the YAML file, every input file it points to and the GoaT taxonomy;
+# the GoaT lookups, the genome profile, the input files of every assembly and, with an
+# image_preprocessor, the report images are read concurrently, so on network storage
+# the time is that of the slowest input rather than the sum
+def parse_report(
+    yaml_file,
+    goat_client=None,
+    build_cache=None,
+    resolver=None,
+    image_preprocessor=None,
+):
+    if resolver is None:
+        resolver = FolderResolver()
+    with stage("load yaml"):
+        yaml_data = load_yaml(yaml_file)
+        sample = read_sample_info(yaml_data)
+
+    def read_taxonomy():
+        with stage("goat taxonomy"):
+            return fetch_taxonomy(sample.species, goat_client)
+
+    def read_profile():
+        with stage("genome profile"):
+            return read_genome_profile(yaml_data, build_cache, resolver)
+
+    with ThreadPoolExecutor() as executor:
+        taxonomy = executor.submit(nested(read_taxonomy))
+        genome_profile = executor.submit(nested(read_profile))
+        with stage("assemblies"):
+            stages, haplotypes, assemblies, pipelines = read_assemblies(
+                yaml_data, build_cache, resolver, executor
+            )
+            curated = [asm for asm in assemblies.values() if asm.stage == "Curated"]
+            spectra = resolver.spectra_groups(
+                {asm.haplotype: asm.properties for asm in curated}
+            )
+
+        # while GoaT and the genome profile may still be read
+        if image_preprocessor is not None:
+            from .render import image_placements
+
+            with stage("pdf images"):
+                image_preprocessor.prepare_all(image_placements(curated, spectra))
+
+        return ReportData(
+            sample=sample,
+            taxonomy=taxonomy.result(),
+            genome_profile=genome_profile.result(),
+            notes=read_notes(yaml_data),
+            sequencing_data=read_sequencing_data(yaml_data),
+            pipelines=pipelines,
+            stages=stages,
+            haplotypes=haplotypes,
+            assemblies=assemblies,
+            spectra=spectra,
+        )
+
+
+# METRICS #####################################################################################
+
+
+# compute EBP quality metric
+def compute_ebp_metric(assembly):
+    try:
+        qv_value = math.floor(float(assembly.qv))
+    except ValueError:
+        raise EARError(
+            f"No QV value for {assembly.stage} {assembly.haplotype}, cannot compute the EBP quality metric"
+        )
+    contig_n50_log = math.floor(math.log10(assembly.gfastats.contig_n50))
+    scaffold_n50_log = math.floor(math.log10(assembly.gfastats.scaffold_n50))
+    return f"{contig_n50_log}.{scaffold_n50_log}.Q{qv_value}"
+
+
+# stage 2: derived metrics (gaps/Gbp, observed haploid size, EBP metrics, BUSCO lineage)
+def compute_metrics(data):
+    gaps_per_gbp = {}
+    for key, assembly in data.assemblies.items():
+        if assembly.gfastats:
+            try:
+                gaps_per_gbp[key] = assembly.gfastats.gaps_per_gbp
+            except ZeroDivisionError:
+                gaps_per_gbp[key] = ""
+
+    curated = data.stage_assemblies("Curated")
+
+    # Extract Total bp for each haplotype and find the maximum
+    total_bp_values = [asm.gfastats.total_bp for asm in curated if asm.gfastats]
+    max_total_bp = f"{max(total_bp_values):,}" if total_bp_values else "NA"
+
+    ebp_metrics = {
+        asm.haplotype: compute_ebp_metric(asm)
+        for asm in curated
+        if asm.gfastats and asm.has_merqury
+    }
+
+    # BUSCO version and lineage, if they are the same across results
+    busco_datasets = [
+        asm.busco.dataset
+        for asm in data.assemblies.values()
+        if asm.busco and asm.busco.dataset
+    ]
+    if not busco_datasets:
+        raise EARError("No BUSCO version and lineage information found in the results")
+    busco_lineage = None
+    if all(dataset == busco_datasets[0] for dataset in busco_datasets):
+        busco_version, lineage_name, num_genomes, num_buscos = busco_datasets[0]
+        busco_lineage = {
+            "version": busco_version,
+            "lineage": lineage_name,
+            "genomes": num_genomes,
+            "buscos": num_buscos,
+        }
+    else:
+        logging.warning(
+            f"WARNING!!! BUSCO versions or lineage datasets are not the same across results"
+        )
+
+    return ReportMetrics(
+        gaps_per_gbp=gaps_per_gbp,
+        max_total_bp=max_total_bp,
+        ebp_metrics=ebp_metrics,
+        busco_lineage=busco_lineage,
+    )
+
+
+# WARNINGS ####################################################################################
+
+
+# check an observed genome trait against the expected one
+def trait_warnings(expected, observed, trait):
+    messages = []
+    try:
+        if trait == "Haploid size (bp)":
+            expected_val = int(expected.replace(",", ""))
+            observed_val = int(observed.replace(",", ""))
+            if abs(expected_val - observed_val) / expected_val > 0.20:
+                messages.append(f"Observed {trait} has >20% difference with Expected")
+        elif trait in ["Haploid Number", "Ploidy"]:
+            # Ensure both values are integers for comparison
+            if int(expected) != int(observed):
+                messages.append(f"Observed {trait} is different from Expected")
+        elif trait == "Sample Sex":
+            # Compare case-insensitive and trimmed strings
+            if expected.strip().lower() != observed.strip().lower():
+                messages.append(f"Observed sex is different from Sample sex")
+    except Exception as e:
+        logging.warning(f"Error in generating warning for {trait}: {str(e)}")
+
+    return messages
+
+
+# Generate warnings for curated haplotypes (qv, kcomp, busco)
+def curated_warnings(assembly):
+    haplotype = assembly.haplotype
+    messages = []
+    try:
+        # Ensure values are correctly interpreted as floats
+        qv_val = float(assembly.qv)
+        completeness_val = float(assembly.completeness)
+        s_value, d_value = assembly.busco.scores[:2]
+
+        if qv_val < 40:
+            messages.append(f"QV value is less than 40 for {haplotype}")
+        if completeness_val < 90:
+            messages.append(f"Kmer completeness value is less than 90 for {haplotype}")
+        if s_value < 90:
+            messages.append(f"BUSCO single copy value is less than 90% for {haplotype}")
+        if d_value > 5:
+            messages.append(f"BUSCO duplicated value is more than 5% for {haplotype}")
+
+    except Exception as e:
+        logging.warning(f"Error in generating warnings for {haplotype}: {str(e)}")
+
+    return messages
+
+
+# Generate warnings for curated haplotypes (loss, gaps, 90inChrom)
+def assembly_warnings(data, metrics):
+    messages = []
+    try:
+        obs_haploid_num = float(data.notes.obs_haploid_num)
+    except (TypeError, ValueError):
+        raise EARError(
+            "# CURATION NOTES Obs_Haploid_num in the yaml file is not a number"
+        )
+
+    for haplotype in data.haplotypes:
+        pre_curation = data.assemblies.get(("Pre-curation", haplotype))
+        curated = data.assemblies.get(("Curated", haplotype))
+        if not (
+            pre_curation and pre_curation.gfastats and curated and curated.gfastats
+        ):
+            raise EARError(
+                f"{haplotype} needs a gfastats report in both Pre-curation and Curated"
+            )
+        pre_curation_bp = pre_curation.gfastats.total_bp
+        curated_bp = curated.gfastats.total_bp
+
+        # Check for assembly length loss > 3%
+        if pre_curation_bp and curated_bp:
+            loss_percentage = (pre_curation_bp - curated_bp) / pre_curation_bp * 100
+            if loss_percentage > 3:
+                messages.append(f"Assembly length loss > 3% for {haplotype}")
+
+        # Check for more than 1000 gaps/Gbp
+        gaps_gbp = metrics.gaps_per_gbp.get(("Curated", haplotype), 0)
+        if gaps_gbp and gaps_gbp > 1000:
+            messages.append(f"More than 1000 gaps/Gbp for {haplotype}")
+
+        # Check that 90% of the assembly is in chromosomes: exactly when the AGP tells
+        # which scaffolds are assigned, else by Scaffold L90 against the Observed
+        # Haploid number
+        chromosome_percent = curated.gfastats.chromosome_percent
+        if chromosome_percent is not None:
+            not_in_chromosomes = chromosome_percent < 90
+        else:
+            not_in_chromosomes = curated.gfastats.scaffold_l90 > obs_haploid_num
+        if not_in_chromosomes:
+            messages.append(f"Not 90% of assembly in chromosomes for {haplotype}")
+
+    return messages
+
+
+# stage 3: everything flagged as different from expected, then as below EBP standards
+def evaluate_warnings(data, metrics):
+    sample = data.sample
+    taxonomy = data.taxonomy
+    profile = data.genome_profile
+    notes = data.notes
+
+    observed_warnings = (
+        trait_warnings(
+            profile.genome_haploid_length, metrics.max_total_bp, "Haploid size (bp)"
+        )
+        + trait_warnings(
+            taxonomy.haploid_number, notes.obs_haploid_num, "Haploid Number"
+        )
+        + trait_warnings(profile.proposed_ploidy, taxonomy.ploidy, "Ploidy")
+        + trait_warnings(sample.sex, notes.obs_sex, "Sample Sex")
+    )
+
+    quality_warnings = []
+    for assembly in data.stage_assemblies("Curated"):
+        if assembly.has_merqury and "busco_short_summary_txt" in assembly.properties:
+            quality_warnings += curated_warnings(assembly)
+
+    return observed_warnings, quality_warnings + assembly_warnings(data, metrics)
+
+
+# ALL STAGES ##################################################################################
+
+
+# stages 1 to 3, without rendering (images are prepared for it with an image_preprocessor)
+def build_report(
+    yaml_file,
+    goat_client=None,
+    build_cache=None,
+    resolver=None,
+    image_preprocessor=None,
+):
+    with stage("parse"):
+        data = parse_report(
+            yaml_file, goat_client, build_cache, resolver, image_preprocessor
+        )
+    with stage("metrics"):
+        metrics = compute_metrics(data)
+    with stage("warnings"):
+        observed_warnings, quality_warnings = evaluate_warnings(data, metrics)
+    return Report(
+        data=data,
+        metrics=metrics,
+        trait_warnings=observed_warnings,
+        quality_warnings=quality_warnings,
+        created=cet_now(),
+    )
+
+
+# the EAR is dated in Central European Time, CEST from 01:00 UTC on the last Sunday of
+# March to 01:00 UTC on the last Sunday of October (the EU rules of the tz "CET" zone)
+CET = timezone(timedelta(hours=1), "CET")
+CEST = timezone(timedelta(hours=2), "CEST")
+
+
+def _last_sunday_1am_utc(year, month):
+    day = datetime(year, month, 31, 1, tzinfo=timezone.utc)
+    return day - timedelta(days=(day.weekday() + 1) % 7)
+
+
+def cet_now(now=None):
+    now = now or datetime.now(timezone.utc)
+    summer = (
+        _last_sunday_1am_utc(now.year, 3) <= now < _last_sunday_1am_utc(now.year, 10)
+    )
+    return now.astimezone(CEST if summer else CET)
+
+
+# build the EAR PDF and its metrics JSON for a YAML file, return the PDF path;
+# with a build_cache, unchanged EARs are copied from the cache instead; with max_size
+# (bytes), the images are re-encoded until the PDF fits
+def make_report(
+    yaml_file,
+    ear_version,
+    goat_client=None,
+    output_dir=".",
+    image_preprocessor=None,
+    build_cache=None,
+    resolver=None,
+    max_size=None,
+):
+    if resolver is None:
+        resolver = FolderResolver()
+    if build_cache is not None:
+        with stage("build cache lookup"):
+            yaml_data = load_yaml(yaml_file)
+            # GoaT responses are cached on disk (ear/goat.py), so this costs no request
+            # when the EAR is built after all
+            taxonomy = fetch_taxonomy(read_sample_info(yaml_data).species, goat_client)
+            fingerprint = build_cache.fingerprint(
+                yaml_file,
+                yaml_data,
+                ear_version,
+                image_preprocessor,
+                resolver,
+                max_size,
+                asdict(taxonomy),
+            )
+            pdf_filename, built = build_cache.restore(fingerprint, output_dir)
+        if pdf_filename:
+            logging.info(
+                f"Inputs of {yaml_file} and its GoaT taxonomy unchanged, reused the EAR built on {built}; its date and time are those of that build"
+            )
+            return pdf_filename
+
+    from .render import render_pdf, render_pdf_within_size
+
+    report = build_report(
+        yaml_file, goat_client, build_cache, resolver, image_preprocessor
+    )
+    tol_id = report.data.sample.tol_id
+
+    # stage 4: the PDF, then the same metrics as typed values next to it
+    pdf_filename = os.path.join(output_dir, f"{tol_id}_EAR.pdf")
+    metrics_filename = os.path.join(output_dir, f"{tol_id}_EAR.json")
+    with stage("render pdf"):
+        if max_size:
+            render_pdf_within_size(
+                report, pdf_filename, ear_version, max_size, image_preprocessor
+            )
+        else:
+            render_pdf(report, pdf_filename, ear_version, image_preprocessor)
+    with stage("metrics json"):
+        write_metrics(metrics_filename, build_metrics_document(report, ear_version))
+
+    if build_cache is not None:
+        with stage("build cache store"):
+            build_cache.store(fingerprint, [pdf_filename, metrics_filename])
+    return pdf_filename
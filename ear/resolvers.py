@@ -0,0 +1,162 @@
+# ear/resolvers.py
+# ERGA Sequencing and Assembly Committee
+# Where the engine finds the result files a YAML refers to: make_EAR.py YAMLs name result
+# folders that are searched for the files, Galaxy YAMLs (glxy/make_EAR_glxy.py) name every
+# dataset explicitly. Everything else about an EAR is shared.
+
+import logging
+from dataclasses import replace
+
+from . import bundles
+from .genome_profile import find_summary
+from .merqury import SpectraPlot, read_merqury_files, read_merqury_folder
+from .model import EARError
+
+
+# result folders: PROFILING <tool> results_folder and ASSEMBLIES ... merqury_folder
+class FolderResolver:
+    # YAML keys of Curated k-mer spectra PNGs, checked by --validate-only
+    spectra_keys = []
+
+    def genomescope_summary(self, profiling_data):
+        genomescope_data = profiling_data.get("GenomeScope")
+        if not genomescope_data:
+            raise EARError(
+                "# PROFILING section in the yaml file is missing or empty for GenomeScope information."
+            )
+        if not genomescope_data.get("results_folder"):
+            raise EARError(
+                "# GenomeScope information in the PROFILING section in the yaml file is missing or empty for results_folder information."
+            )
+        return find_summary(
+            genomescope_data["results_folder"], "*summary.txt", "GenomeScope"
+        )
+
+    # raises EARError when there is no Smudgeplot summary, which is optional
+    def smudgeplot_summary(self, profiling_data):
+        smudgeplot_data = profiling_data.get("Smudgeplot")
+        if not smudgeplot_data:
+            raise EARError(
+                "# PROFILING section in the yaml file is missing or empty for Smudgeplot information."
+            )
+        if not smudgeplot_data.get("results_folder"):
+            raise EARError(
+                "# Smudgeplot information in the PROFILING section in the yaml file is missing or empty for results_folder information."
+            )
+        return find_summary(
+            smudgeplot_data["results_folder"], "*verbose_summary.txt", "Smudgeplot"
+        )
+
+    def has_merqury(self, properties):
+        return "merqury_folder" in properties
+
+    def merqury(self, properties):
+        folder = properties["merqury_folder"]
+        if not bundles.isdir(folder):
+            raise EARError(f"Merqury folder not found: {folder}")
+        return read_merqury_folder(folder)
+
+    # k-mer spectra tables of the curated haplotypes (haplotype -> YAML entries): the
+    # spectra plots picked from each Merqury folder by their file names, padded with
+    # None to 4, for the first haplotype using that folder, and None for the others
+    def spectra_groups(self, curated_properties):
+        groups = []
+        processed_folders = set()
+        for properties in curated_properties.values():
+            folder = properties.get("merqury_folder")
+            if folder is None or folder in processed_folders:
+                groups.append(None)
+                continue
+            processed_folders.add(folder)
+            try:
+                results = read_merqury_folder(folder)
+                # the Merqury assembly in row i of the tables is the i-th haplotype
+                # of the stage with this folder
+                haplotypes = [
+                    haplotype
+                    for haplotype, other in curated_properties.items()
+                    if other.get("merqury_folder") == folder
+                ]
+                names = dict(zip(results.assembly_names(), haplotypes))
+                plots = [
+                    replace(plot, assembly=names.get(plot.assembly, plot.assembly))
+                    for plot in results.select_spectra()
+                ]
+            except Exception as e:
+                logging.warning(f"Error reading {folder}: {str(e)}")
+                plots = []
+            if len(plots) < 4:
+                logging.warning(
+                    f"Warning: Less than 4 k-mer spectra (PNG or .hist) found in {folder}. If this is diploid, some plots may be missing."
+                )
+                plots += [None] * (4 - len(plots))
+            groups.append(plots)
+        return groups
+
+
+# Galaxy datasets: every file has its own YAML key and any file name
+class GalaxyResolver:
+    spectra_keys = [
+        "merqury_hap_spectra_cn_png",
+        "merqury_spectra_cn_png",
+        "merqury_spectra_asm_png",
+    ]
+
+    def genomescope_summary(self, profiling_data):
+        genomescope_data = profiling_data.get("GenomeScope")
+        if not genomescope_data:
+            raise EARError("GenomeScope data is missing in the PROFILING section.")
+        summary_file = genomescope_data.get("genomescope_summary_txt")
+        if not summary_file or not bundles.isfile(summary_file):
+            raise EARError(f"File {summary_file} not found for GenomeScope.")
+        return summary_file
+
+    def smudgeplot_summary(self, profiling_data):
+        smudgeplot_data = profiling_data.get("Smudgeplot")
+        if not smudgeplot_data:
+            raise EARError("Smudgeplot data is missing in the PROFILING section.")
+        summary_file = smudgeplot_data.get("smudgeplot_verbose_summary_txt")
+        if not summary_file or not bundles.isfile(summary_file):
+            raise EARError(
+                f"Verbose summary file {summary_file} not found for Smudgeplot."
+            )
+        return summary_file
+
+    def has_merqury(self, properties):
+        return "merqury_qv" in properties
+
+    def merqury(self, properties):
+        files = [
+            properties.get("merqury_qv"),
+            properties.get("merqury_completeness_stats"),
+        ]
+        for path in files:
+            if path and not bundles.isfile(path):
+                raise EARError(f"Merqury file not found: {path}")
+        return read_merqury_files(*files)
+
+    # one table: the spectra-cn plot of each curated haplotype, then the spectra-cn and
+    # spectra-asm plots of the whole assembly (taken from the first haplotype giving them)
+    def spectra_groups(self, curated_properties):
+        plots = [
+            SpectraPlot(
+                properties["merqury_hap_spectra_cn_png"], "cn", assembly=haplotype
+            )
+            for haplotype, properties in curated_properties.items()
+            if properties.get("merqury_hap_spectra_cn_png")
+        ]
+        for key, plot in [
+            ("merqury_spectra_cn_png", "cn"),
+            ("merqury_spectra_asm_png", "asm"),
+        ]:
+            png_file = next(
+                (
+                    properties[key]
+                    for properties in curated_properties.values()
+                    if properties.get(key)
+                ),
+                None,
+            )
+            if png_file:
+                plots.append(SpectraPlot(png_file, plot))
+        return [plots] if plots else []
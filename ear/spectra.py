@@ -0,0 +1,192 @@
+# ear/spectra.py
+# ERGA Sequencing and Assembly Committee
+# K-mer spectra drawn from Merqury's .spectra-cn.hist and .spectra-asm.hist tables as
+# reportlab vector graphics: stacked areas of k-mer counts by copy number (or by the
+# assemblies the k-mers are in), binned with numpy to about a point of plot width each
+
+import math
+
+from reportlab.graphics.shapes import Drawing, Group, Line, Polygon, Rect, String
+from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from . import bundles
+
+MAX_BINS = 200
+# k-mers seen fewer times are mostly read errors, left out of the axis limits
+MIN_PEAK_MULTIPLICITY = 4
+X_MAX_QUANTILE = 0.99
+X_MAX_MARGIN = 1.25
+READ_ONLY = "read-only"
+# as Merqury's plots: read-only k-mers in black, the others in the Set1 palette
+SPECTRA_COLORS = ["#E41A1C", "#377EB8", "#4DAF4A", "#984EA3", "#FF7F00", "#A65628"]
+READ_ONLY_COLOR = "#000000"
+FONT = ("Helvetica", 6)
+
+
+# (categories in file order, category index, multiplicity and count of each row) of a
+# Merqury .hist table: "<copies or assembly>\tkmer_multiplicity\tCount" rows
+def read_spectra_hist(path):
+    import numpy as np
+
+    categories = {}
+    category_ids = []
+    multiplicities = []
+    counts = []
+    with bundles.open_input(path) as file:
+        next(file, None)
+        for number, line in enumerate(file, 2):
+            fields = line.rstrip("\n").split("\t")
+            if not line.strip():
+                continue
+            try:
+                multiplicities.append(int(fields[1]))
+                counts.append(float(fields[2]))
+            except (IndexError, ValueError):
+                raise ValueError(f"Invalid line {number} in {path}: {line.strip()}")
+            category_ids.append(categories.setdefault(fields[0], len(categories)))
+    if not categories:
+        raise ValueError(f"No k-mer counts in {path}")
+    return (
+        list(categories),
+        np.array(category_ids),
+        np.array(multiplicities),
+        np.array(counts),
+    )
+
+
+# the multiplicity the x axis ends at: a margin past where X_MAX_QUANTILE of the k-mers
+# seen at least MIN_PEAK_MULTIPLICITY times are
+def spectra_x_max(multiplicities, counts):
+    import numpy as np
+
+    totals = np.bincount(multiplicities, weights=counts)[MIN_PEAK_MULTIPLICITY:]
+    if not totals.any():
+        return max(MIN_PEAK_MULTIPLICITY, int(multiplicities.max()))
+    cumulative = np.cumsum(totals)
+    quantile = int(np.searchsorted(cumulative, cumulative[-1] * X_MAX_QUANTILE))
+    return math.ceil((MIN_PEAK_MULTIPLICITY + quantile) * X_MAX_MARGIN)
+
+
+# (bin centres, categories x bins mean counts) of the rows with multiplicities 1..x_max
+def bin_spectra(category_ids, multiplicities, counts, n_categories, x_max):
+    import numpy as np
+
+    bins = min(MAX_BINS, x_max)
+    keep = (multiplicities >= 1) & (multiplicities <= x_max)
+    bin_ids = (multiplicities[keep] - 1) * bins // x_max
+    sums = np.bincount(
+        category_ids[keep] * bins + bin_ids,
+        weights=counts[keep],
+        minlength=n_categories * bins,
+    ).reshape(n_categories, bins)
+
+    # mean over the multiplicities of each bin, drawn at their mean
+    all_multiplicities = np.arange(1, x_max + 1)
+    all_bin_ids = (all_multiplicities - 1) * bins // x_max
+    widths = np.bincount(all_bin_ids, minlength=bins)
+    centres = np.bincount(all_bin_ids, weights=all_multiplicities) / widths
+    return centres, sums / widths
+
+
+# about count round steps from 0 to max_value
+def axis_ticks(max_value, count=5):
+    raw_step = max_value / count
+    magnitude = 10 ** math.floor(math.log10(raw_step)) if raw_step > 0 else 1
+    step = next(
+        factor * magnitude for factor in [1, 2, 5, 10] if factor * magnitude >= raw_step
+    )
+    return [i * step for i in range(int(max_value / step) + 1)]
+
+
+def format_tick(value):
+    for divisor, suffix in [(1e9, "G"), (1e6, "M"), (1e3, "k")]:
+        if value >= divisor:
+            return f"{value / divisor:g}{suffix}"
+    return f"{value:g}"
+
+
+# a Drawing of the stacked spectra of a Merqury .hist table, width x height points
+def spectra_drawing(path, width, height):
+    import numpy as np
+
+    categories, category_ids, multiplicities, counts = read_spectra_hist(path)
+    x_max = spectra_x_max(multiplicities, counts)
+    centres, binned = bin_spectra(
+        category_ids, multiplicities, counts, len(categories), x_max
+    )
+
+    # copy numbers (or assemblies) stacked from the axis up, read-only k-mers on top
+    order = [i for i, name in enumerate(categories) if name != READ_ONLY]
+    order += [i for i, name in enumerate(categories) if name == READ_ONLY]
+    stacked = np.cumsum(binned[order], axis=0)
+    past_errors = centres >= MIN_PEAK_MULTIPLICITY
+    y_max = (stacked[-1][past_errors].max() if past_errors.any() else 0) * 1.1
+    if y_max <= 0:
+        y_max = max(stacked[-1].max(), 1)
+
+    font_name, font_size = FONT
+    legend_width = font_size + 2
+    legend_width += max(stringWidth(name, font_name, font_size) for name in categories)
+    left, bottom, right, top = 30, 22, legend_width + 6, 4
+    plot_width = width - left - right
+    plot_height = height - bottom - top
+
+    def point(x, y):
+        return (
+            left + x / x_max * plot_width,
+            bottom + min(y, y_max) / y_max * plot_height,
+        )
+
+    drawing = Drawing(width, height)
+    lower = np.zeros(len(centres))
+    palette = iter(SPECTRA_COLORS * len(categories))
+    legend = []
+    for index, upper in zip(order, stacked):
+        name = categories[index]
+        color = colors.HexColor(READ_ONLY_COLOR if name == READ_ONLY else next(palette))
+        points = []
+        for x, y in zip(centres, upper):
+            points += point(x, y)
+        for x, y in zip(centres[::-1], lower[::-1]):
+            points += point(x, y)
+        drawing.add(Polygon(points, fillColor=color, strokeColor=None))
+        legend.append((name, color))
+        lower = upper
+
+    # axes, ticks and labels
+    axis = dict(strokeColor=colors.black, strokeWidth=0.5)
+    drawing.add(Line(left, bottom, left + plot_width, bottom, **axis))
+    drawing.add(Line(left, bottom, left, bottom + plot_height, **axis))
+    label = dict(fontName=font_name, fontSize=font_size)
+    for tick in axis_ticks(x_max):
+        x, y = point(tick, 0)
+        drawing.add(Line(x, y, x, y - 2, **axis))
+        drawing.add(String(x, y - 8, format_tick(tick), textAnchor="middle", **label))
+    for tick in axis_ticks(y_max):
+        x, y = point(0, tick)
+        drawing.add(Line(x, y, x - 2, y, **axis))
+        drawing.add(String(x - 3, y - 2, format_tick(tick), textAnchor="end", **label))
+    drawing.add(
+        String(
+            left + plot_width / 2,
+            2,
+            "kmer_multiplicity",
+            textAnchor="middle",
+            **label,
+        )
+    )
+    y_label = Group(String(0, 0, "Count", textAnchor="middle", **label))
+    y_label.translate(font_size, bottom + plot_height / 2)
+    y_label.rotate(90)
+    drawing.add(y_label)
+
+    # legend right of the plot, top of the stack first
+    x = width - legend_width
+    for row, (name, color) in enumerate(reversed(legend)):
+        y = bottom + plot_height - (row + 1) * (font_size + 2)
+        drawing.add(
+            Rect(x, y, font_size - 1, font_size - 1, fillColor=color, strokeColor=None)
+        )
+        drawing.add(String(x + font_size + 1, y, name, **label))
+    return drawing
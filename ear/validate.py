@@ -0,0 +1,327 @@
+# ear/validate.py
+# ERGA Sequencing and Assembly Committee
+# Preflight checks of an EAR YAML file, without GoaT calls or building the PDF
+
+import re
+
+from . import bundles
+from .agp import read_fai_agp_stats
+from .blobtoolkit import read_blobdir
+from .busco import read_busco_summary
+from .gfastats import read_gfastats_report
+from .hic import is_cooler, open_cooler, select_resolution
+from .model import EARError
+from .report import REQUIRED_FIELDS, VALID_TAGS
+from .resolvers import FolderResolver
+
+REQUIRED_STAGES = ["Pre-curation", "Curated"]
+
+GENOMESCOPE_LENGTH_RE = re.compile(r"Genome Haploid Length\s+([\d,]+) bp")
+GENOMESCOPE_PLOIDY_RE = re.compile(r"p = (\d+)")
+
+
+class Problems:
+    def __init__(self):
+        self.errors = []
+        self.warnings = []
+
+    def error(self, message):
+        self.errors.append(message)
+
+    def warning(self, message):
+        self.warnings.append(message)
+
+
+def _is_number(value):
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+# check that path is set and exists, and return it if so
+def _check_path(problems, path, what, is_dir=False):
+    if not path:
+        problems.error(f"{what} is missing or empty")
+        return None
+    if not isinstance(path, str):
+        problems.error(f"{what} must be a path, got '{path}'")
+        return None
+    if not (bundles.isdir(path) if is_dir else bundles.isfile(path)):
+        problems.error(f"{what} not found: {path}")
+        return None
+    return path
+
+
+# a .cool or .mcool file with the bins and pixels the HiC map is drawn from
+def _check_cooler(problems, path, what):
+    if not _check_path(problems, path, what):
+        return
+    if not is_cooler(path):
+        problems.error(f"{what} must be a .mcool or .cool file: {path}")
+        return
+    try:
+        with open_cooler(path) as file:
+            group = select_resolution(file, 1)
+            for name in [
+                "bins/chrom",
+                "pixels/bin1_id",
+                "pixels/bin2_id",
+                "pixels/count",
+            ]:
+                if name not in group:
+                    problems.error(f"{what} has no {name}: {path}")
+    except (EARError, OSError, KeyError, ValueError) as e:
+        problems.error(f"{what}: {str(e)}")
+
+
+# a BlobDir the blob plot can be drawn from
+def _check_blobdir(problems, path, what):
+    if not _check_path(problems, path, what, is_dir=True):
+        return
+    try:
+        read_blobdir(path)
+    except (OSError, ValueError) as e:
+        problems.error(f"{what}: {str(e)}")
+
+
+def _check_fasta(problems, path, what):
+    try:
+        with bundles.open_input(path, "rb") as file:
+            start = file.read(1024).lstrip()
+    except (OSError, EOFError) as e:
+        problems.error(f"{what} cannot be read: {str(e)}")
+        return
+    if not start.startswith(b">"):
+        problems.error(f"{what} is not a FASTA file: {path}")
+
+
+def _check_general(problems, yaml_data, resolver):
+    missing = [field for field in REQUIRED_FIELDS if not yaml_data.get(field)]
+    if missing:
+        problems.error(
+            f"# GENERAL INFORMATION section is missing or empty for: {', '.join(missing)}"
+        )
+    if "Species" not in missing and not isinstance(yaml_data["Species"], str):
+        problems.error(
+            f"# GENERAL INFORMATION 'Species' must be text, got '{type(yaml_data['Species']).__name__}'"
+        )
+    if "Tags" not in missing and yaml_data["Tags"] not in VALID_TAGS:
+        problems.warning(
+            f"# GENERAL INFORMATION invalid tag '{yaml_data['Tags']}'. Valid tags are {', '.join(VALID_TAGS)}"
+        )
+
+
+def _check_profiling(problems, yaml_data, resolver):
+    profiling_data = yaml_data.get("PROFILING")
+    if not isinstance(profiling_data, dict) or not profiling_data:
+        problems.error("# PROFILING section is missing or empty")
+        return
+
+    try:
+        summary_file = resolver.genomescope_summary(profiling_data)
+    except EARError as e:
+        problems.error(str(e))
+    else:
+        with bundles.open_input(summary_file) as file:
+            summary_txt = file.read()
+        if not GENOMESCOPE_LENGTH_RE.search(summary_txt):
+            problems.error(f"No 'Genome Haploid Length' found in {summary_file}")
+        if not GENOMESCOPE_PLOIDY_RE.search(summary_txt):
+            problems.warning(
+                f"No ploidy ('p = ') found in {summary_file}, it will be reported as NA"
+            )
+
+    try:
+        summary_file = resolver.smudgeplot_summary(profiling_data)
+    except EARError as e:
+        problems.warning(f"{str(e)} Ploidy will be taken from GenomeScope")
+        return
+    with bundles.open_input(summary_file) as file:
+        if not any(line.startswith("* Proposed ploidy") for line in file):
+            problems.warning(f"No '* Proposed ploidy' line in {summary_file}")
+
+
+# returns True if the BUSCO lineage line was found
+def _check_busco(problems, path, what):
+    if not _check_path(problems, path, what):
+        return False
+    try:
+        summary = read_busco_summary(path)
+    except ValueError as e:
+        problems.error(f"{what}: {str(e)}")
+        return False
+    if summary.scores is None or None in summary.scores:
+        problems.error(f"{what}: no 'C:..[S:..,D:..],F:..,M:..,n:..' results in {path}")
+    if summary.lineage is None:
+        problems.warning(f"{what}: no lineage dataset information in {path}")
+        return False
+    return True
+
+
+def _check_merqury(problems, resolver, properties, order, what):
+    try:
+        results = resolver.merqury(properties)
+    except (EARError, OSError, ValueError) as e:
+        problems.error(f"{what}: {str(e)}")
+        return
+    if not results.qv_tables:
+        problems.error(f"{what}: no assembly-level .qv file")
+    elif not _is_number(results.qv(order)):
+        problems.error(f"{what}: no QV for assembly #{order + 1}")
+    if not results.completeness_tables:
+        problems.error(f"{what}: no completeness.stats file")
+    elif not _is_number(results.completeness(order)):
+        problems.error(f"{what}: no k-mer completeness for assembly #{order + 1}")
+
+
+def _check_assemblies(problems, yaml_data, resolver):
+    asm_data = yaml_data.get("ASSEMBLIES")
+    if not isinstance(asm_data, dict) or not asm_data:
+        problems.error("# ASSEMBLIES section is missing or empty")
+        return
+
+    for stage in REQUIRED_STAGES:
+        if not isinstance(asm_data.get(stage), dict):
+            problems.error(f"# ASSEMBLIES section has no '{stage}' stage")
+
+    haplotypes = {}
+    has_busco_lineage = False
+    for stage, stage_properties in asm_data.items():
+        if not isinstance(stage_properties, dict):
+            continue
+        stage_haplotypes = [key for key in stage_properties if key != "pipeline"]
+        haplotypes[stage] = stage_haplotypes
+
+        for order, haplotype in enumerate(stage_haplotypes):
+            properties = stage_properties[haplotype]
+            what = f"# ASSEMBLIES {stage} {haplotype}"
+            if not isinstance(properties, dict):
+                problems.error(f"{what} has no input files")
+                continue
+
+            if "assembly_fai" in properties and not properties.get(
+                "gfastats--nstar-report_txt"
+            ):
+                paths = [
+                    _check_path(problems, properties.get(key), f"{what} {key}")
+                    for key in ["assembly_fai", "assembly_agp"]
+                ]
+                if all(paths):
+                    try:
+                        read_fai_agp_stats(*paths)
+                    except ValueError as e:
+                        problems.error(f"{what}: {str(e)}")
+            elif "assembly_fasta" in properties and not properties.get(
+                "gfastats--nstar-report_txt"
+            ):
+                # only the start of the FASTA, reading it all is left to make_report
+                fasta_path = _check_path(
+                    problems, properties["assembly_fasta"], f"{what} assembly_fasta"
+                )
+                if fasta_path:
+                    _check_fasta(problems, fasta_path, f"{what} assembly_fasta")
+            else:
+                gfastats_path = _check_path(
+                    problems,
+                    properties.get("gfastats--nstar-report_txt"),
+                    f"{what} gfastats--nstar-report_txt",
+                )
+                if gfastats_path:
+                    try:
+                        read_gfastats_report(gfastats_path)
+                    except ValueError as e:
+                        problems.error(f"{what}: {str(e)}")
+
+            if "busco_short_summary_txt" in properties:
+                has_busco_lineage |= _check_busco(
+                    problems,
+                    properties["busco_short_summary_txt"],
+                    f"{what} busco_short_summary_txt",
+                )
+            if resolver.has_merqury(properties):
+                _check_merqury(problems, resolver, properties, order, f"{what} Merqury")
+
+            if stage == "Curated":
+                if properties.get("hic_FullMap_mcool") and not properties.get(
+                    "hic_FullMap_png"
+                ):
+                    _check_cooler(
+                        problems,
+                        properties["hic_FullMap_mcool"],
+                        f"{what} hic_FullMap_mcool",
+                    )
+                    fields = ["blobplot_cont_png"]
+                else:
+                    fields = ["hic_FullMap_png", "blobplot_cont_png"]
+                if properties.get("blobtoolkit_dataset"):
+                    _check_blobdir(
+                        problems,
+                        properties["blobtoolkit_dataset"],
+                        f"{what} blobtoolkit_dataset",
+                    )
+                    fields.remove("blobplot_cont_png")
+                for field in fields:
+                    if properties.get(field):
+                        _check_path(problems, properties[field], f"{what} {field}")
+                    else:
+                        problems.warning(f"{what} {field} is missing or empty")
+                for field in resolver.spectra_keys:
+                    if properties.get(field):
+                        _check_path(problems, properties[field], f"{what} {field}")
+
+    if not has_busco_lineage:
+        problems.error("# ASSEMBLIES no BUSCO short summary with lineage information")
+
+    # assembly warnings compare each haplotype before and after curation
+    if all(stage in haplotypes for stage in REQUIRED_STAGES):
+        for stage, other in [REQUIRED_STAGES, REQUIRED_STAGES[::-1]]:
+            for haplotype in haplotypes[stage]:
+                if haplotype not in haplotypes[other]:
+                    problems.error(
+                        f"# ASSEMBLIES {stage} {haplotype} has no matching {other} {haplotype}"
+                    )
+
+
+def _check_notes(problems, yaml_data, resolver):
+    notes = yaml_data.get("NOTES") or {}
+    if not _is_number(notes.get("Obs_Haploid_num")):
+        problems.error("# CURATION NOTES Obs_Haploid_num must be a number")
+
+
+# check a YAML file and return its Problems (errors stop make_report, warnings do not)
+def validate_yaml(yaml_file, resolver=None):
+    import yaml
+
+    if resolver is None:
+        resolver = FolderResolver()
+    problems = Problems()
+    try:
+        with bundles.open_input(yaml_file) as file:
+            yaml_data = yaml.safe_load(file)
+    except (OSError, yaml.YAMLError) as e:
+        problems.error(f"Cannot read YAML: {str(e)}")
+        return problems
+    if not isinstance(yaml_data, dict):
+        problems.error("The YAML file does not contain EAR sections")
+        return problems
+    yaml_data = bundles.resolve_yaml_paths(yaml_file, yaml_data)
+
+    for check in [_check_general, _check_profiling, _check_assemblies, _check_notes]:
+        try:
+            check(problems, yaml_data, resolver)
+        except Exception as e:
+            problems.error(f"Unexpected error during {check.__name__[7:]} checks: {e}")
+    return problems
+
+
+def print_problems(yaml_file, problems):
+    status = "FAILED" if problems.errors else "OK"
+    print(
+        f"{yaml_file}: {status} ({len(problems.errors)} errors, {len(problems.warnings)} warnings)"
+    )
+    for message in problems.errors:
+        print(f"  ERROR: {message}")
+    for message in problems.warnings:
+        print(f"  WARNING: {message}")